@@ -2,15 +2,30 @@
 
 from uuid import UUID
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from db.database import DatabaseSession, get_db_session
-from db.models import Account, Transaction
+from db.models import (
+    Account,
+    ScheduledTransfer,
+    ScheduledTransferStatus,
+    Transaction,
+)
 from services.transaction_service import TransactionService
+from services.event_hub import transaction_event_hub
+from services.reconciliation_service import (
+    ReconciliationReport,
+    ReconciliationService,
+)
 from core.exceptions import (
     AccountNotFoundError,
     InsufficientFundsError,
+    ScheduledTransferNotFoundError,
     SelfTransferError,
+    TransferLimitExceededError,
 )
 from .security import get_api_key
 from pydantic import BaseModel
@@ -26,6 +41,25 @@ class TransactionCreateRequest(BaseModel):
     amount: Decimal
 
 
+# --- Modelo para el cuerpo de la petición de transferencias programadas ---
+class ScheduledTransferCreateRequest(BaseModel):
+    source_account_id: UUID
+    destination_account_id: UUID
+    amount: Decimal
+    execute_at: datetime
+    interval_seconds: int | None = None
+
+
+# --- Modelo para activar el saldo fragmentado de una cuenta ---
+class BalanceShardingRequest(BaseModel):
+    slots: int
+
+
+# Intervalo (en segundos) entre comentarios keep-alive del stream de eventos.
+# Mantiene viva la conexión a través de proxies cuando no hay actividad.
+EVENT_STREAM_KEEPALIVE_SECONDS = 15.0
+
+
 # --- Endpoints ---
 
 
@@ -36,6 +70,38 @@ async def get_all_accounts(db: DatabaseSession = Depends(get_db_session)):
     return service.get_all_accounts()
 
 
+# Debe declararse antes de /accounts/{account_id} para que "search" no se
+# interprete como un ID de cuenta.
+@router.get("/accounts/search", response_model=list[Account])
+async def search_accounts(
+    name_prefix: str | None = Query(default=None, min_length=1, max_length=100),
+    min_balance: Decimal | None = Query(default=None, ge=0),
+    max_balance: Decimal | None = Query(default=None, ge=0),
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=100),
+    db: DatabaseSession = Depends(get_db_session),
+):
+    """
+    Busca cuentas por prefijo del nombre del titular, rango de saldo y rango
+    de fecha de creación. Los resultados están paginados con offset/limit.
+    """
+    service = TransactionService(db)
+    try:
+        return service.search_accounts(
+            name_prefix=name_prefix,
+            min_balance=min_balance,
+            max_balance=max_balance,
+            created_from=created_from,
+            created_to=created_to,
+            offset=offset,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/accounts/{account_id}", response_model=Account)
 async def get_account_details(
     account_id: UUID, db: DatabaseSession = Depends(get_db_session)
@@ -60,6 +126,70 @@ async def get_account_transactions(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
+@router.get("/accounts/{account_id}/events")
+async def stream_account_events(
+    account_id: UUID, request: Request, db: DatabaseSession = Depends(get_db_session)
+):
+    """
+    Emite en tiempo real (Server-Sent Events) las transacciones completadas
+    de una cuenta, como alternativa a consultar periódicamente su historial.
+    """
+    service = TransactionService(db)
+    try:
+        service.get_account(account_id)
+    except AccountNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    subscription = transaction_event_hub.subscribe([account_id])
+
+    async def event_stream():
+        try:
+            while not subscription.closed:
+                frames = await subscription.next_batch(
+                    timeout=EVENT_STREAM_KEEPALIVE_SECONDS
+                )
+                if await request.is_disconnected():
+                    break
+                if frames:
+                    yield b"".join(frames)
+                elif not subscription.closed:
+                    yield b": keep-alive\n\n"
+            if subscription.overflowed:
+                # El consumidor no ha seguido el ritmo: se le avisa antes de cerrar.
+                yield b"event: overflow\ndata: {}\n\n"
+        finally:
+            transaction_event_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/accounts/{account_id}/balance-sharding",
+    response_model=Account,
+    dependencies=[Depends(get_api_key)],  # Endpoint protegido
+)
+async def enable_account_balance_sharding(
+    account_id: UUID,
+    sharding_request: BalanceShardingRequest,
+    db: DatabaseSession = Depends(get_db_session),
+):
+    """
+    Activa el modo de saldo fragmentado en una cuenta muy concurrida (p. ej. un
+    comercio), para que los abonos concurrentes no compitan entre sí.
+    """
+    service = TransactionService(db)
+    try:
+        return service.enable_balance_sharding(account_id, sharding_request.slots)
+    except AccountNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.post(
     "/transactions",
     response_model=Transaction,
@@ -76,14 +206,22 @@ async def create_new_transaction(
     """
     service = TransactionService(db)
     try:
-        # Pasamos los datos del cuerpo de la petición al servicio
-        completed_transaction = service.create_transaction(
+        # Pasamos los datos del cuerpo de la petición al servicio. Se ejecuta en
+        # el pool de hilos: espera a los locks de fila y del libro mayor, y una
+        # conciliación en curso no debe bloquear el bucle de eventos.
+        completed_transaction = await run_in_threadpool(
+            service.create_transaction,
             source_account_id=transaction_request.source_account_id,
             destination_account_id=transaction_request.destination_account_id,
             amount=transaction_request.amount,
         )
         return completed_transaction
-    except (AccountNotFoundError, InsufficientFundsError, SelfTransferError) as e:
+    except (
+        AccountNotFoundError,
+        InsufficientFundsError,
+        SelfTransferError,
+        TransferLimitExceededError,
+    ) as e:
         # Capturamos errores de negocio y los devolvemos como un error 400 Bad Request.
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
@@ -92,3 +230,87 @@ async def create_new_transaction(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=detail
         )
+
+
+@router.post(
+    "/admin/reconciliation",
+    response_model=ReconciliationReport,
+    dependencies=[Depends(get_api_key)],  # Endpoint protegido
+)
+async def run_reconciliation(
+    full: bool = False, db: DatabaseSession = Depends(get_db_session)
+):
+    """
+    Concilia el libro mayor y devuelve las cuentas cuyo saldo no cuadra con su
+    saldo inicial más sus transacciones completadas. Por defecto solo revisa las
+    particiones que han cambiado desde la última conciliación correcta.
+    """
+    service = ReconciliationService(db)
+    # La conciliación es intensiva en CPU: la ejecutamos fuera del event loop.
+    return await run_in_threadpool(service.reconcile, full)
+
+
+@router.post(
+    "/scheduled-transfers",
+    response_model=ScheduledTransfer,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(get_api_key)],  # Endpoint protegido
+)
+async def create_scheduled_transfer(
+    scheduled_request: ScheduledTransferCreateRequest,
+    db: DatabaseSession = Depends(get_db_session),
+):
+    """
+    Programa una transferencia para una fecha futura. Si se indica
+    interval_seconds, la transferencia se repite con ese periodo.
+    """
+    service = TransactionService(db)
+    try:
+        return service.schedule_transfer(
+            source_account_id=scheduled_request.source_account_id,
+            destination_account_id=scheduled_request.destination_account_id,
+            amount=scheduled_request.amount,
+            execute_at=scheduled_request.execute_at,
+            interval_seconds=scheduled_request.interval_seconds,
+        )
+    except (AccountNotFoundError, SelfTransferError, ValueError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/scheduled-transfers", response_model=list[ScheduledTransfer])
+async def list_scheduled_transfers(
+    account_id: UUID | None = None,
+    status_filter: ScheduledTransferStatus | None = Query(default=None, alias="status"),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=100),
+    db: DatabaseSession = Depends(get_db_session),
+):
+    """
+    Lista las transferencias programadas en orden de creación, filtradas por
+    cuenta y/o estado, con paginación.
+    """
+    service = TransactionService(db)
+    try:
+        return service.get_scheduled_transfers(
+            account_id=account_id, status=status_filter, offset=offset, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.delete(
+    "/scheduled-transfers/{scheduled_id}",
+    response_model=ScheduledTransfer,
+    dependencies=[Depends(get_api_key)],  # Endpoint protegido
+)
+async def cancel_scheduled_transfer(
+    scheduled_id: UUID, db: DatabaseSession = Depends(get_db_session)
+):
+    """Cancela una transferencia programada que aún está pendiente."""
+    service = TransactionService(db)
+    try:
+        return service.cancel_scheduled_transfer(scheduled_id)
+    except ScheduledTransferNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,143 @@
+# benchmarks/bench_account_search.py
+"""
+Benchmark de la búsqueda indexada de cuentas frente a un recorrido lineal.
+
+Da de alta N cuentas sintéticas a través de DatabaseSession.save_account (los
+mismos modelos e índices que usa la API) y mide DatabaseSession.search_accounts
+con filtros sueltos y combinados, comparándolo con filtrar y ordenar la lista
+completa de cuentas. Las cuentas son modelos Pydantic, así que cada millón
+ocupa del orden de 1 GB de memoria.
+
+Uso:
+    python -m benchmarks.bench_account_search --accounts 1000000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from db.database import DatabaseSession
+from db.indexes import normalize_owner_name
+from db.models import Account
+
+_FIRST_NAMES = ["ana", "kevin", "lucia", "martin", "pedro", "sofia", "tomas", "valeria"]
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def populate(db: DatabaseSession, accounts: int, seed: int = 7):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(accounts):
+        db.save_account(
+            Account(
+                owner_name=f"{rng.choice(_FIRST_NAMES)} {rng.getrandbits(40):010x}",
+                balance=Decimal(rng.randrange(0, 10_000_000)).scaleb(-2),
+                created_at=_EPOCH + timedelta(seconds=rng.randrange(365 * 86400)),
+            )
+        )
+    elapsed = time.perf_counter() - start
+    print(f"cuentas:             {accounts}")
+    print(
+        f"alta con índices:    {elapsed:.1f} s ({elapsed / accounts * 1e6:.1f} µs/cuenta)"
+    )
+
+
+def linear_search(db: DatabaseSession, filters: dict, offset: int, limit: int):
+    """Lo que haría search_accounts sin índices: filtrar todo y ordenar."""
+    prefix = filters.get("name_prefix")
+    prefix = normalize_owner_name(prefix) if prefix else None
+    low_balance = filters.get("min_balance")
+    high_balance = filters.get("max_balance")
+    created_from = filters.get("created_from")
+    created_to = filters.get("created_to")
+    found = [
+        account
+        for account in db.get_all_accounts()
+        if (
+            prefix is None
+            or normalize_owner_name(account.owner_name).startswith(prefix)
+        )
+        and (low_balance is None or account.balance >= low_balance)
+        and (high_balance is None or account.balance <= high_balance)
+        and (created_from is None or account.created_at >= created_from)
+        and (created_to is None or account.created_at <= created_to)
+    ]
+    if prefix is not None:
+        found.sort(key=lambda a: (normalize_owner_name(a.owner_name), a.id))
+    elif low_balance is not None or high_balance is not None:
+        found.sort(key=lambda a: (a.balance, a.id))
+    else:
+        found.sort(key=lambda a: (a.created_at, a.id))
+    return found[offset : offset + limit]
+
+
+def timed(label: str, func, repeat: int) -> list:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<44} {elapsed * 1e3:>10.3f} ms  ({len(result)} resultados)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--linear-repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    db = DatabaseSession()
+    populate(db, args.accounts)
+    offset, limit = 100, 50
+    queries = {
+        "prefijo de nombre": {"name_prefix": "martin a"},
+        "rango de saldo": {
+            "min_balance": Decimal("50000.00"),
+            "max_balance": Decimal("51000.00"),
+        },
+        "rango de fechas": {
+            "created_from": _EPOCH + timedelta(days=100),
+            "created_to": _EPOCH + timedelta(days=101),
+        },
+        "prefijo + saldo estrecho": {
+            "name_prefix": "martin",
+            "min_balance": Decimal("50000.00"),
+            "max_balance": Decimal("50500.00"),
+        },
+        "prefijo + saldo amplio": {
+            "name_prefix": "martin",
+            "min_balance": Decimal("10000.00"),
+        },
+        "saldo + fechas (ambos amplios)": {
+            "min_balance": Decimal("20000.00"),
+            "max_balance": Decimal("80000.00"),
+            "created_from": _EPOCH + timedelta(days=30),
+            "created_to": _EPOCH + timedelta(days=300),
+        },
+        "prefijo + saldo + fechas": {
+            "name_prefix": "sofia",
+            "min_balance": Decimal("90000.00"),
+            "created_from": _EPOCH + timedelta(days=180),
+        },
+    }
+
+    print()
+    for label, filters in queries.items():
+        indexed = timed(
+            f"índice: {label}",
+            lambda: db.search_accounts(**filters, offset=offset, limit=limit),
+            args.repeat,
+        )
+        linear = timed(
+            f"lineal: {label}",
+            lambda: linear_search(db, filters, offset, limit),
+            args.linear_repeat,
+        )
+        assert [a.id for a in indexed] == [a.id for a in linear], label
+
+
+if __name__ == "__main__":
+    main()
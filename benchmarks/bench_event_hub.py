@@ -0,0 +1,91 @@
+# benchmarks/bench_event_hub.py
+"""
+Benchmark del hub de eventos de transacciones con muchos suscriptores concurrentes.
+
+Simula N consumidores (corrutinas) suscritos a la misma cuenta y publica una
+ráfaga de transacciones, midiendo el coste de publicación (fan-out) y el tiempo
+hasta que todos los consumidores han recibido todos los eventos.
+
+Uso:
+    python -m benchmarks.bench_event_hub --subscribers 10000 --events 100
+"""
+
+import argparse
+import asyncio
+import time
+from decimal import Decimal
+from uuid import uuid4
+
+from db.models import Transaction, TransactionStatus
+from services.event_hub import TransactionEventHub
+
+
+async def run(subscribers: int, events: int):
+    hub = TransactionEventHub(max_buffer=events + 1)
+    account_id = uuid4()
+    counterparty_id = uuid4()
+    received = 0
+
+    async def consumer(subscription):
+        nonlocal received
+        got = 0
+        while got < events:
+            frames = await subscription.next_batch(timeout=30)
+            got += len(frames)
+        received += got
+
+    start = time.perf_counter()
+    subscriptions = [hub.subscribe([account_id]) for _ in range(subscribers)]
+    tasks = [asyncio.create_task(consumer(s)) for s in subscriptions]
+    await asyncio.sleep(0)  # Dejamos que todos los consumidores queden a la espera.
+    subscribe_elapsed = time.perf_counter() - start
+
+    transactions = [
+        Transaction(
+            source_account_id=counterparty_id,
+            destination_account_id=account_id,
+            amount=Decimal("1.00"),
+            status=TransactionStatus.COMPLETED,
+        )
+        for _ in range(events)
+    ]
+
+    start = time.perf_counter()
+    for transaction in transactions:
+        hub.publish(transaction)
+    publish_elapsed = time.perf_counter() - start
+
+    await asyncio.gather(*tasks)
+    delivery_elapsed = time.perf_counter() - start
+
+    # Referencia: coste de serializar cada evento una vez por suscriptor.
+    sample = transactions[: max(1, events // 10)]
+    start = time.perf_counter()
+    for transaction in sample:
+        for _ in range(subscribers):
+            TransactionEventHub.format_event(transaction)
+    naive_elapsed = (time.perf_counter() - start) * events / len(sample)
+
+    deliveries = subscribers * events
+    print(f"suscriptores:              {subscribers}")
+    print(f"eventos publicados:        {events}")
+    print(f"entregas totales:          {received} (esperadas {deliveries})")
+    print(f"alta de suscriptores:      {subscribe_elapsed * 1000:.1f} ms")
+    print(
+        f"publicación (fan-out):     {publish_elapsed * 1000:.1f} ms "
+        f"({publish_elapsed / deliveries * 1e9:.0f} ns/entrega)"
+    )
+    print(f"entrega completa:          {delivery_elapsed * 1000:.1f} ms")
+    print(f"serializar por suscriptor: {naive_elapsed * 1000:.1f} ms (estimado)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.subscribers, args.events))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# benchmarks/bench_hot_account.py
+"""
+Benchmark de muchos escritores concurrentes transfiriendo a una única cuenta
+de destino "caliente", con y sin el modo de saldo fragmentado.
+
+Cada hilo usa su propia cuenta de origen, de modo que la única contención
+posible es la de la cuenta de destino. Las reglas de velocidad se desactivan
+para no limitar el número de transferencias por cuenta.
+
+En memoria, y con el GIL, tomar un lock de fila cuesta lo mismo que no
+tomarlo, así que la prueba no mediría nada. Para que se parezca a una base de
+datos real, cada viaje de ida y vuelta espera --row-latency-ms con los locks
+correspondientes tomados: al bloquear las filas (SELECT ... FOR UPDATE), al
+escribir un saldo de fila y al escribir en los slots de un saldo fragmentado.
+Así los dos modos pagan lo mismo por cada escritura y solo cambia qué locks
+se mantienen durante la espera.
+
+Uso:
+    python -m benchmarks.bench_hot_account --writers 32 --transfers 200 --slots 16
+"""
+
+import argparse
+import contextlib
+import io
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import partial
+from typing import Iterator
+from unittest import mock
+from uuid import UUID
+
+from db import database
+from db.database import DatabaseSession
+from db.models import Account
+from db.sharding import ShardedBalance
+from services.risk_engine import RiskEngine
+from services.transaction_service import TransactionService
+
+
+class RoundTripSession(DatabaseSession):
+    """Sesión que simula la latencia de la base de datos con las filas bloqueadas."""
+
+    def __init__(self, row_latency: float):
+        self.row_latency = row_latency
+
+    @contextmanager
+    def lock_accounts(self, *account_ids: UUID) -> Iterator[None]:
+        with super().lock_accounts(*account_ids):
+            time.sleep(self.row_latency)
+            yield
+
+    def save_account(self, account: Account):
+        # Se llama con la fila todavía bloqueada por lock_accounts.
+        time.sleep(self.row_latency)
+        super().save_account(account)
+
+
+class RoundTripShardedBalance(ShardedBalance):
+    """Saldo fragmentado que simula la latencia con los slots bloqueados."""
+
+    def __init__(self, initial_balance: Decimal, slots: int, row_latency: float):
+        super().__init__(initial_balance, slots)
+        # Reentrantes, para poder esperar con los slots tomados y delegar el
+        # cargo en la implementación original, que vuelve a tomarlos.
+        self._locks = [threading.RLock() for _ in range(slots)]
+        self.row_latency = row_latency
+
+    def credit(self, amount: Decimal):
+        slot = next(self._cursor) % len(self._slots)
+        with self._locks[slot]:
+            time.sleep(self.row_latency)
+            self._slots[slot] += amount
+
+    def try_debit(self, amount: Decimal) -> bool:
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            time.sleep(self.row_latency)
+            return super().try_debit(amount)
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+def run(writers: int, transfers: int, slots: int | None, row_latency: float) -> float:
+    # Sin reglas de velocidad: aquí solo medimos la contención en el destino.
+    service = TransactionService(
+        RoundTripSession(row_latency), risk_engine=RiskEngine([])
+    )
+    merchant = service.create_account("Comercio", Decimal("0.00"))
+    if slots:
+        sharded_balance = partial(RoundTripShardedBalance, row_latency=row_latency)
+        with mock.patch.object(database, "ShardedBalance", sharded_balance):
+            service.enable_balance_sharding(merchant.id, slots)
+    sources = [
+        service.create_account(f"Cliente {i}", Decimal(transfers))
+        for i in range(writers)
+    ]
+    barrier = threading.Barrier(writers + 1)
+
+    def writer(source_id):
+        barrier.wait()
+        for _ in range(transfers):
+            service.create_transaction(source_id, merchant.id, Decimal("1.00"))
+
+    threads = [threading.Thread(target=writer, args=(s.id,)) for s in sources]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    expected = Decimal(writers * transfers).quantize(Decimal("0.01"))
+    assert service.get_account(merchant.id).balance == expected
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--transfers", type=int, default=200)
+    parser.add_argument("--slots", type=int, default=16)
+    parser.add_argument("--row-latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    total = args.writers * args.transfers
+    latency = args.row_latency_ms / 1000
+    # create_transaction imprime una línea por transacción: la descartamos.
+    with contextlib.redirect_stdout(io.StringIO()):
+        plain = run(args.writers, args.transfers, None, latency)
+        sharded = run(args.writers, args.transfers, args.slots, latency)
+
+    print(
+        f"escritores: {args.writers}, transferencias: {total}, "
+        f"latencia por viaje de ida y vuelta: {args.row_latency_ms} ms"
+    )
+    print(f"sin fragmentar:          {plain:.2f} s ({total / plain:,.0f} tx/s)")
+    print(
+        f"fragmentado ({args.slots} slots): {sharded:.2f} s ({total / sharded:,.0f} tx/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_reconciliation.py
+"""
+Benchmark de la conciliación del libro mayor: ejecución secuencial frente al
+pool de procesos, y ejecución incremental tras unos pocos cambios.
+
+El pool se crea (y se calienta) antes de medir, como hace el lifespan de la
+aplicación. La aceleración en paralelo solo puede observarse con varios
+núcleos: con uno solo, el pool únicamente añade el coste de enviar los datos.
+
+Genera N cuentas y T transacciones COMPLETED directamente en la base de datos
+en memoria (sin pasar por el servicio, para que la carga sea rápida) y
+mantiene los saldos coherentes con ellas.
+
+Uso:
+    python -m benchmarks.bench_reconciliation --accounts 100000 --transactions 1000000
+"""
+
+import argparse
+import os
+import random
+import time
+from decimal import Decimal
+
+from db.database import DatabaseSession
+from db.models import Account, Transaction, TransactionStatus
+from services.reconciliation_service import ReconciliationService, create_worker_pool
+
+
+def populate(db: DatabaseSession, accounts: int, transactions: int):
+    rng = random.Random(11)
+    rows = [
+        Account(owner_name=f"Cuenta {i}", balance=Decimal("1000000.00"))
+        for i in range(accounts)
+    ]
+    for account in rows:
+        db.save_account(account)
+    for _ in range(transactions):
+        source, destination = rng.sample(rows, 2)
+        amount = Decimal(rng.randrange(1, 10_000)).scaleb(-2)
+        source.balance -= amount
+        destination.balance += amount
+        db.save_transaction(
+            Transaction(
+                source_account_id=source.id,
+                destination_account_id=destination.id,
+                amount=amount,
+                status=TransactionStatus.COMPLETED,
+            )
+        )
+    for account in rows:
+        db.save_account(account)
+    return rows
+
+
+def timed(label: str, service: ReconciliationService, full: bool):
+    start = time.perf_counter()
+    report = service.reconcile(full=full)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28} {elapsed:7.2f} s  particiones={report.checked_partitions:>3} "
+        f"discrepancias={len(report.mismatches)} conserva={report.money_conserved}"
+    )
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=100_000)
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args()
+
+    db = DatabaseSession()
+    start = time.perf_counter()
+    rows = populate(db, args.accounts, args.transactions)
+    print(f"cuentas: {args.accounts}, transacciones: {args.transactions}")
+    print(f"carga de datos: {time.perf_counter() - start:.1f} s\n")
+
+    print(f"núcleos disponibles: {os.cpu_count()}")
+    sequential = timed("secuencial (1 proceso)", ReconciliationService(db), True)
+    pool = create_worker_pool(args.workers)
+    # Arranca los procesos antes de medir: en la aplicación ya están en marcha.
+    for future in [pool.submit(int) for _ in range(args.workers)]:
+        future.result()
+    parallel = timed(
+        f"paralelo ({args.workers} procesos)",
+        ReconciliationService(db, pool),
+        True,
+    )
+    print(f"aceleración: x{sequential / parallel:.2f}\n")
+
+    # Unos pocos cambios: solo se revisan las particiones afectadas.
+    rows[0].balance -= Decimal("1.00")
+    rows[1].balance += Decimal("1.00")
+    db.save_account(rows[0])
+    db.save_account(rows[1])
+    db.save_transaction(
+        Transaction(
+            source_account_id=rows[0].id,
+            destination_account_id=rows[1].id,
+            amount=Decimal("1.00"),
+            status=TransactionStatus.COMPLETED,
+        )
+    )
+    incremental = ReconciliationService(db, pool)
+    timed("incremental (2 cuentas)", incremental, False)
+    # Sin cambios no se lee ninguna partición.
+    timed("incremental (sin cambios)", incremental, False)
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
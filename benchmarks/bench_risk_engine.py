@@ -0,0 +1,82 @@
+# benchmarks/bench_risk_engine.py
+"""
+Benchmark de la latencia añadida por las reglas de velocidad en cada transferencia.
+
+Mide el coste de RiskEngine.guard_transfer (comprobar y registrar) con las reglas por defecto,
+y lo compara con recalcular los mismos límites recorriendo el historial de
+transacciones de la cuenta (lo que haría get_transactions_for_account).
+
+Uso:
+    python -m benchmarks.bench_risk_engine --sources 1000 --checks 200000
+"""
+
+import argparse
+import random
+import time
+from decimal import Decimal
+from uuid import uuid4
+
+from core.config import DEFAULT_VELOCITY_RULES, VelocityRuleConfig
+from services.risk_engine import RiskEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sources", type=int, default=1000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--history", type=int, default=1000)
+    args = parser.parse_args()
+
+    # Límites muy altos para que ninguna comprobación sea rechazada y medir
+    # siempre el camino completo (consulta + registro).
+    rules = [
+        VelocityRuleConfig(
+            name=rule.name,
+            window=rule.window,
+            max_count=10**9,
+            max_amount=Decimal(10**12),
+            max_new_destinations=10**9 if rule.max_new_destinations else None,
+        )
+        for rule in DEFAULT_VELOCITY_RULES
+    ]
+    fake_now = [0.0]
+    engine = RiskEngine(rules, clock=lambda: fake_now[0])
+    rng = random.Random(3)
+    sources = [uuid4() for _ in range(args.sources)]
+    destinations = [uuid4() for _ in range(50)]
+    amount = Decimal("12.34")
+
+    start = time.perf_counter()
+    for i in range(args.checks):
+        # Simula ~1000 transferencias por segundo repartidas entre las cuentas.
+        fake_now[0] = i / 1000
+        source, destination = rng.choice(sources), rng.choice(destinations)
+        with engine.guard_transfer(source, destination, amount):
+            pass
+    elapsed = time.perf_counter() - start
+    print(
+        f"reglas: {len(rules)}, cuentas: {args.sources}, comprobaciones: {args.checks}"
+    )
+    print(f"motor de reglas:       {elapsed / args.checks * 1e6:.1f} µs/transferencia")
+
+    # Referencia: recorrer un historial de N transacciones de la cuenta.
+    history = [
+        (i * 10.0, rng.choice(destinations), amount) for i in range(args.history)
+    ]
+    now = args.history * 10.0
+    repeat = 2000
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for window in (60, 3600, 86400):
+            recent = [h for h in history if now - h[0] <= window]
+            sum((h[2] for h in recent), Decimal("0"))
+            len({h[1] for h in recent})
+    elapsed = time.perf_counter() - start
+    print(
+        f"recorrer historial ({args.history} tx): "
+        f"{elapsed / repeat * 1e6:.1f} µs/transferencia"
+    )
+
+
+if __name__ == "__main__":
+    main()
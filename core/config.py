@@ -1,6 +1,9 @@
 # core/config.py
+from decimal import Decimal
+from typing import Literal
+
 from pydantic_settings import BaseSettings
-from pydantic import SecretStr
+from pydantic import BaseModel, Field, SecretStr
 from dotenv import load_dotenv
 
 # Carga las variables de entorno desde el archivo .env
@@ -8,6 +11,39 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+class VelocityRuleConfig(BaseModel):
+    """
+    Regla de velocidad aplicada a cada cuenta de origen antes de mover dinero.
+    Los límites que se dejan en None no se comprueban.
+    """
+
+    name: str
+    window: Literal["minute", "hour", "day"]
+    max_count: int | None = Field(default=None, ge=1)
+    max_amount: Decimal | None = Field(default=None, gt=0)
+    # Máximo de destinatarios nuevos (a los que nunca se había transferido).
+    max_new_destinations: int | None = Field(default=None, ge=1)
+
+
+# Reglas por defecto. Se pueden sustituir con la variable de entorno
+# VELOCITY_RULES, en formato JSON (ver .env.example).
+DEFAULT_VELOCITY_RULES = [
+    VelocityRuleConfig(
+        name="por-minuto", window="minute", max_count=30, max_amount=Decimal("10000")
+    ),
+    VelocityRuleConfig(
+        name="por-hora", window="hour", max_count=300, max_amount=Decimal("50000")
+    ),
+    VelocityRuleConfig(
+        name="por-dia",
+        window="day",
+        max_count=2000,
+        max_amount=Decimal("200000"),
+        max_new_destinations=50,
+    ),
+]
+
+
 class Settings(BaseSettings):
     """
     Clase que gestiona la configuración de la aplicación.
@@ -23,6 +59,17 @@ class Settings(BaseSettings):
     SECRET_KEY: SecretStr
     ADMIN_API_KEY: SecretStr
 
+    # Reglas de velocidad (límites por cuenta de origen) para las transferencias.
+    VELOCITY_RULES: list[VelocityRuleConfig] = DEFAULT_VELOCITY_RULES
+
+    # Número de procesos que usa la conciliación del libro mayor.
+    RECONCILIATION_WORKERS: int = Field(default=4, ge=1)
+
+    # Resolución (en segundos) del planificador de transferencias programadas.
+    SCHEDULER_TICK_SECONDS: float = Field(default=1.0, gt=0)
+    # Máximo de transferencias programadas que se ejecutan en cada lote.
+    SCHEDULER_BATCH_SIZE: int = Field(default=200, ge=1)
+
     class Config:
         # Define el archivo del cual se pueden leer las variables de entorno.
         # En Pydantic V2, se recomienda usar @classmethod y settings_customise_sources
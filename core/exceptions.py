@@ -27,6 +27,18 @@ class SelfTransferError(TransactionError):
     pass
 
 
+class TransferLimitExceededError(TransactionError):
+    """Se lanza cuando una transferencia supera un límite de velocidad (regla de riesgo)."""
+
+    pass
+
+
+class ScheduledTransferNotFoundError(TransactionError):
+    """Se lanza cuando no se encuentra una transferencia programada."""
+
+    pass
+
+
 class InvalidAPIKeyError(Exception):
     """Se lanza cuando una API Key es inválida o no se proporciona."""
 
@@ -1,10 +1,25 @@
 # db/database.py
 
-from typing import Dict, List
+import hashlib
+import threading
+from array import array
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterator, List, NamedTuple, Set, Tuple
 from uuid import UUID
 from decimal import Decimal
+from datetime import datetime
 
-from .models import Account, Transaction
+from .models import (
+    Account,
+    ScheduledTransfer,
+    ScheduledTransferStatus,
+    Transaction,
+    TransactionStatus,
+)
+from .indexes import SortedKeyIndex, normalize_owner_name
+from .locks import SharedExclusiveLock
+from .sharding import ShardedBalance
 
 # --- SIMULACIÓN DE ALMACENAMIENTO EN BASE DE DATOS ---
 # En un sistema real, esto sería una base de datos SQL o NoSQL.
@@ -12,6 +27,110 @@ from .models import Account, Transaction
 # Las claves serán los UUIDs para un acceso rápido.
 _accounts_db: Dict[UUID, Account] = {}
 _transactions_db: Dict[UUID, Transaction] = {}
+_scheduled_transfers_db: Dict[UUID, ScheduledTransfer] = {}
+# IDs de las transferencias programadas en orden de creación, y el mismo
+# índice por cuenta (origen o destino). Son listas de solo añadir: se pueden
+# recorrer sin copiarlas aunque otro hilo dé de alta transferencias, algo que
+# el diccionario no permite.
+_scheduled_order: List[UUID] = []
+_scheduled_by_account: Dict[UUID, List[UUID]] = {}
+# Protege los cambios de estado condicionales (ver update_scheduled_transfer_status).
+_scheduled_lock = threading.Lock()
+
+# --- ÍNDICES SECUNDARIOS DE CUENTAS ---
+# Simulan los índices que crearíamos en una base de datos real. Cada índice
+# guarda tuplas (valor, id_de_cuenta) ordenadas, y se mantienen al día en
+# save_account. _indexed_keys recuerda los valores indexados de cada cuenta
+# para poder retirar sus entradas antiguas cuando cambian.
+_name_index = SortedKeyIndex()
+_balance_index = SortedKeyIndex()
+_created_at_index = SortedKeyIndex()
+_indexed_keys: Dict[UUID, Tuple[str, Decimal, datetime]] = {}
+# Los índices no son seguros entre hilos: se protegen con un único lock.
+_index_lock = threading.Lock()
+
+# --- BLOQUEOS DE FILA Y SALDOS FRAGMENTADOS ---
+# _account_locks simula los bloqueos de fila (SELECT ... FOR UPDATE) de una
+# base de datos real. Las cuentas con el modo de saldo fragmentado activado
+# guardan su saldo en _sharded_balances en lugar de en Account.balance, y no
+# necesitan bloqueo de fila para recibir abonos. _dirty_sharded_balances
+# anota las que han cambiado para refrescar su entrada en el índice de saldos.
+_account_locks: Dict[UUID, threading.Lock] = {}
+_sharded_balances: Dict[UUID, ShardedBalance] = {}
+_dirty_sharded_balances: Set[UUID] = set()
+
+# --- CONCILIACIÓN ---
+# Las cuentas se reparten en RECONCILIATION_PARTITIONS particiones según su
+# UUID. Cada partición guarda sus propios datos de conciliación en céntimos,
+# mantenidos al día en save_account y save_transaction, para que revisar una
+# partición no obligue a leer las demás (ver _LedgerPartition).
+# Cada partición tiene además un checksum incremental (XOR de un digest por
+# cuenta y saldo, y por cada transacción COMPLETED que la toca). Si no ha
+# cambiado desde su última verificación correcta, no hace falta revisarla:
+# _verified_partitions recuerda ese checksum junto con los totales de la
+# partición, que se reutilizan para comprobar que el dinero se conserva.
+# _ledger_lock separa los movimientos de saldo de las transferencias (modo
+# compartido) de la foto de los datos que toma la conciliación (modo exclusivo).
+RECONCILIATION_PARTITIONS = 64
+
+
+class _LedgerPartition:
+    """
+    Datos de conciliación de una partición. La cuenta con posición i (ver
+    _ledger_slots) tiene su saldo inicial en openings[i] y su saldo actual en
+    balances[i]; cada transacción COMPLETED añade un movimiento (posición de
+    la cuenta, céntimos con signo) por cada cuenta de la partición que toca.
+    Los arrays de enteros se copian y se envían a otro proceso sin coste apreciable.
+    """
+
+    __slots__ = (
+        "account_ids",
+        "openings",
+        "balances",
+        "movement_slots",
+        "movement_cents",
+    )
+
+    def __init__(self):
+        self.account_ids: List[UUID] = []
+        self.openings = array("q")
+        self.balances = array("q")
+        self.movement_slots = array("q")
+        self.movement_cents = array("q")
+
+
+class PartitionSnapshot(NamedTuple):
+    """Copia coherente de los datos de conciliación de una partición."""
+
+    account_ids: List[UUID]
+    openings: array
+    balances: array
+    movement_slots: array
+    movement_cents: array
+
+
+class VerifiedPartition(NamedTuple):
+    """Checksum y totales (en céntimos) de una partición conciliada sin errores."""
+
+    checksum: int
+    opening_cents: int
+    balance_cents: int
+
+
+_ledger_partitions: List[_LedgerPartition] = [
+    _LedgerPartition() for _ in range(RECONCILIATION_PARTITIONS)
+]
+_ledger_slots: Dict[UUID, int] = {}
+_partition_checksums: List[int] = [0] * RECONCILIATION_PARTITIONS
+_verified_partitions: Dict[int, VerifiedPartition] = {}
+_checksummed_transactions: Set[UUID] = set()
+_checksum_lock = threading.Lock()
+_ledger_lock = SharedExclusiveLock()
+
+# Límites para construir rangos de claves (valor, id) en los índices.
+_MIN_UUID = UUID(int=0)
+_MAX_UUID = UUID(int=(1 << 128) - 1)
+_MAX_CHAR = "\U0010ffff"
 
 
 def _initialize_mock_data():
@@ -19,8 +138,122 @@ def _initialize_mock_data():
     if not _accounts_db:  # Solo inicializar si está vacío
         account1 = Account(owner_name="Martin Vargas", balance=Decimal("1000.00"))
         account2 = Account(owner_name="Kevin Rosero", balance=Decimal("500.50"))
-        _accounts_db[account1.id] = account1
-        _accounts_db[account2.id] = account2
+        session = DatabaseSession()
+        session.save_account(account1)
+        session.save_account(account2)
+
+
+def _reset_storage():
+    """
+    Vacía todas las tablas, índices y estructuras auxiliares en memoria.
+    Lo usan las pruebas para que cada una empiece con la base de datos limpia.
+    """
+    global _name_index, _balance_index, _created_at_index
+    with _index_lock, _checksum_lock:
+        _accounts_db.clear()
+        _transactions_db.clear()
+        _scheduled_transfers_db.clear()
+        _scheduled_order.clear()
+        _scheduled_by_account.clear()
+        _name_index = SortedKeyIndex()
+        _balance_index = SortedKeyIndex()
+        _created_at_index = SortedKeyIndex()
+        _indexed_keys.clear()
+        _account_locks.clear()
+        _sharded_balances.clear()
+        _dirty_sharded_balances.clear()
+        _ledger_partitions[:] = [
+            _LedgerPartition() for _ in range(RECONCILIATION_PARTITIONS)
+        ]
+        _ledger_slots.clear()
+        _partition_checksums[:] = [0] * RECONCILIATION_PARTITIONS
+        _verified_partitions.clear()
+        _checksummed_transactions.clear()
+
+
+def partition_of(account_id: UUID) -> int:
+    """Partición de conciliación a la que pertenece una cuenta."""
+    return account_id.int % RECONCILIATION_PARTITIONS
+
+
+def _digest(*parts: bytes) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(b"|".join(parts), digest_size=8).digest(), "big"
+    )
+
+
+def _account_digest(account_id: UUID, balance: Decimal) -> int:
+    return _digest(account_id.bytes, str(balance).encode())
+
+
+def _to_cents(amount: Decimal) -> int:
+    return int(amount.scaleb(2))
+
+
+def _index_account(account: Account):
+    """
+    Actualiza los índices secundarios y los datos de conciliación con los
+    valores actuales de la cuenta (requiere _index_lock).
+    """
+    name_key = normalize_owner_name(account.owner_name)
+    previous = _indexed_keys.get(account.id)
+    partition = partition_of(account.id)
+    ledger = _ledger_partitions[partition]
+    if previous is not None:
+        old_name, old_balance, old_created_at = previous
+        if old_balance != account.balance:
+            ledger.balances[_ledger_slots[account.id]] = _to_cents(account.balance)
+            with _checksum_lock:
+                _partition_checksums[partition] ^= _account_digest(
+                    account.id, old_balance
+                ) ^ _account_digest(account.id, account.balance)
+        if old_name != name_key:
+            _name_index.remove((old_name, account.id))
+            _name_index.add((name_key, account.id))
+        if old_balance != account.balance:
+            _balance_index.remove((old_balance, account.id))
+            _balance_index.add((account.balance, account.id))
+        if old_created_at != account.created_at:
+            _created_at_index.remove((old_created_at, account.id))
+            _created_at_index.add((account.created_at, account.id))
+    else:
+        cents = _to_cents(account.balance)
+        _ledger_slots[account.id] = len(ledger.account_ids)
+        ledger.account_ids.append(account.id)
+        ledger.openings.append(cents)
+        ledger.balances.append(cents)
+        with _checksum_lock:
+            _partition_checksums[partition] ^= _account_digest(
+                account.id, account.balance
+            )
+        _name_index.add((name_key, account.id))
+        _balance_index.add((account.balance, account.id))
+        _created_at_index.add((account.created_at, account.id))
+    _indexed_keys[account.id] = (name_key, account.balance, account.created_at)
+
+
+def _materialize(account: Account) -> Account:
+    """Devuelve la cuenta con su saldo real si tiene el saldo fragmentado."""
+    sharded = _sharded_balances.get(account.id)
+    if sharded is None:
+        return account
+    return account.model_copy(update={"balance": sharded.total()})
+
+
+def _row_lock(account_id: UUID) -> threading.Lock:
+    """Devuelve (creándolo si hace falta) el lock de fila de una cuenta."""
+    lock = _account_locks.get(account_id)
+    if lock is None:
+        # setdefault es atómico: si dos hilos compiten, ambos obtienen el mismo lock.
+        lock = _account_locks.setdefault(account_id, threading.Lock())
+    return lock
+
+
+def _refresh_sharded_index_entries():
+    """Reindexa el saldo de las cuentas fragmentadas que han cambiado (requiere _index_lock)."""
+    while _dirty_sharded_balances:
+        account_id = _dirty_sharded_balances.pop()
+        _index_account(_materialize(_accounts_db[account_id]))
 
 
 class DatabaseSession:
@@ -32,19 +265,366 @@ class DatabaseSession:
 
     def get_account_by_id(self, account_id: UUID) -> Account | None:
         """Busca una cuenta por su UUID."""
-        return _accounts_db.get(account_id)
+        account = _accounts_db.get(account_id)
+        if account is None:
+            return None
+        return _materialize(account)
 
     def save_account(self, account: Account):
-        """Guarda o actualiza una cuenta en la 'base de datos'."""
+        """
+        Guarda o actualiza una cuenta en la 'base de datos' y sus índices.
+        En las cuentas con saldo fragmentado, el campo balance se ignora: el
+        saldo solo cambia a través de credit/try_debit_sharded_balance.
+        """
         _accounts_db[account.id] = account
+        with _index_lock:
+            _index_account(_materialize(account))
 
     def get_all_accounts(self) -> List[Account]:
         """Devuelve todas las cuentas."""
-        return list(_accounts_db.values())
+        return [_materialize(account) for account in list(_accounts_db.values())]
+
+    @contextmanager
+    def lock_accounts(self, *account_ids: UUID) -> Iterator[None]:
+        """
+        Bloquea las filas de las cuentas indicadas mientras dura el bloque `with`.
+
+        Los locks se adquieren siempre en el mismo orden (por UUID) para evitar
+        interbloqueos. Las cuentas con saldo fragmentado no se bloquean: sus
+        slots tienen sus propios locks.
+        """
+        locks = [
+            _row_lock(account_id)
+            for account_id in sorted(set(account_ids))
+            if account_id not in _sharded_balances
+        ]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def enable_balance_sharding(self, account_id: UUID, slots: int):
+        """
+        Activa el modo de saldo fragmentado en N slots para una cuenta.
+        El saldo actual pasa al primer slot.
+
+        Raises:
+            ValueError: Si la cuenta ya está fragmentada con otro número de slots.
+        """
+        with self.lock_accounts(account_id):
+            current = _sharded_balances.get(account_id)
+            if current is not None:
+                if current.slot_count != slots:
+                    raise ValueError(
+                        f"La cuenta {account_id} ya tiene el saldo fragmentado "
+                        f"en {current.slot_count} slots."
+                    )
+                return
+            account = _accounts_db[account_id]
+            _sharded_balances[account_id] = ShardedBalance(account.balance, slots)
+
+    def is_balance_sharded(self, account_id: UUID) -> bool:
+        """Indica si la cuenta tiene activado el modo de saldo fragmentado."""
+        return account_id in _sharded_balances
+
+    def credit_sharded_balance(self, account_id: UUID, amount: Decimal):
+        """Abona un monto en uno de los slots de una cuenta fragmentada."""
+        _sharded_balances[account_id].credit(amount)
+        _dirty_sharded_balances.add(account_id)
+
+    def try_debit_sharded_balance(self, account_id: UUID, amount: Decimal) -> bool:
+        """
+        Descuenta un monto del saldo agregado de una cuenta fragmentada.
+
+        Returns:
+            False si el saldo agregado no es suficiente.
+        """
+        debited = _sharded_balances[account_id].try_debit(amount)
+        if debited:
+            _dirty_sharded_balances.add(account_id)
+        return debited
+
+    def search_accounts(
+        self,
+        name_prefix: str | None = None,
+        min_balance: Decimal | None = None,
+        max_balance: Decimal | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> List[Account]:
+        """
+        Busca cuentas usando los índices secundarios (todos los filtros se combinan con AND).
+
+        El orden de los resultados depende solo de qué filtros se usan, nunca de
+        cuántas cuentas cumple cada uno, para que la paginación sea estable: por
+        nombre normalizado si hay prefijo (o ningún filtro), si no por saldo, y
+        si no por fecha de creación; con el ID como desempate.
+
+        Con varios filtros se cuenta en O(log n) cuántas entradas cumple cada
+        uno. Si el índice más selectivo no es el del orden y es lo bastante
+        pequeño, se recorre entero y se ordenan sus coincidencias; si no, se
+        recorre el índice del orden comprobando el resto de filtros.
+        """
+        with _index_lock:
+            _refresh_sharded_index_entries()
+            return self._search_indexes(
+                name_prefix,
+                min_balance,
+                max_balance,
+                created_from,
+                created_to,
+                offset,
+                limit,
+            )
+
+    def _search_indexes(
+        self,
+        name_prefix: str | None,
+        min_balance: Decimal | None,
+        max_balance: Decimal | None,
+        created_from: datetime | None,
+        created_to: datetime | None,
+        offset: int,
+        limit: int,
+    ) -> List[Account]:
+        prefix = normalize_owner_name(name_prefix) if name_prefix else None
+        # Cada rango es (índice, clave mínima, clave máxima, posición del valor
+        # en _indexed_keys); el primero de la lista fija el orden del resultado.
+        ranges = []
+        if prefix is not None:
+            ranges.append((_name_index, (prefix,), (prefix + _MAX_CHAR,), 0))
+        if min_balance is not None or max_balance is not None:
+            ranges.append(
+                (
+                    _balance_index,
+                    None if min_balance is None else (min_balance, _MIN_UUID),
+                    None if max_balance is None else (max_balance, _MAX_UUID),
+                    1,
+                )
+            )
+        if created_from is not None or created_to is not None:
+            ranges.append(
+                (
+                    _created_at_index,
+                    None if created_from is None else (created_from, _MIN_UUID),
+                    None if created_to is None else (created_to, _MAX_UUID),
+                    2,
+                )
+            )
+        if not ranges:
+            ranges.append((_name_index, None, None, 0))
+
+        order_index, order_min, order_max, order_field = ranges[0]
+        if len(ranges) == 1:
+            # Un único filtro: la paginación salta directamente a la posición.
+            page = islice(order_index.irange(order_min, order_max, skip=offset), limit)
+            return [_materialize(_accounts_db[account_id]) for _, account_id in page]
+
+        def matches(account_id: UUID) -> bool:
+            name_key, balance, created_at = _indexed_keys[account_id]
+            return (
+                (prefix is None or name_key.startswith(prefix))
+                and (min_balance is None or balance >= min_balance)
+                and (max_balance is None or balance <= max_balance)
+                and (created_from is None or created_at >= created_from)
+                and (created_to is None or created_at <= created_to)
+            )
+
+        counts = [
+            index.count(min_key, max_key) for index, min_key, max_key, _ in ranges
+        ]
+        smallest = min(range(len(ranges)), key=counts.__getitem__)
+        wanted = offset + limit
+        # Suponiendo filtros independientes, recorrer el índice del orden cuesta
+        # unas wanted / densidad entradas hasta llenar la página (como mucho
+        # todo su rango); recorrer el más selectivo cuesta todo su rango y
+        # después ordenar las coincidencias.
+        total = len(_indexed_keys)
+        density = 1.0
+        for count in counts[1:]:
+            density *= count / total
+        walk_cost = counts[0] if density == 0 else min(counts[0], wanted / density)
+        if smallest != 0 and counts[smallest] < walk_cost:
+            index, min_key, max_key, _ = ranges[smallest]
+            found = [
+                account_id
+                for _, account_id in index.irange(min_key, max_key)
+                if matches(account_id)
+            ]
+            found.sort(
+                key=lambda account_id: (
+                    _indexed_keys[account_id][order_field],
+                    account_id,
+                )
+            )
+            return [
+                _materialize(_accounts_db[account_id])
+                for account_id in found[offset:wanted]
+            ]
+
+        results: List[Account] = []
+        skipped = 0
+        for _, account_id in order_index.irange(order_min, order_max):
+            if len(results) >= limit:
+                break
+            if not matches(account_id):
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            results.append(_materialize(_accounts_db[account_id]))
+        return results
 
     def save_transaction(self, transaction: Transaction):
         """Guarda una nueva transacción."""
         _transactions_db[transaction.id] = transaction
+        if transaction.status == TransactionStatus.COMPLETED:
+            # Un digest distinto por lado, para que no se anulen entre sí si
+            # ambas cuentas caen en la misma partición.
+            amount = str(transaction.amount).encode()
+            debit = _digest(transaction.id.bytes, b"debit", amount)
+            credit = _digest(transaction.id.bytes, b"credit", amount)
+            cents = _to_cents(transaction.amount)
+            with _checksum_lock:
+                if transaction.id in _checksummed_transactions:
+                    return
+                _checksummed_transactions.add(transaction.id)
+                for account_id, digest, movement in (
+                    (transaction.source_account_id, debit, -cents),
+                    (transaction.destination_account_id, credit, cents),
+                ):
+                    partition = partition_of(account_id)
+                    _partition_checksums[partition] ^= digest
+                    slot = _ledger_slots.get(account_id)
+                    if slot is not None:
+                        ledger = _ledger_partitions[partition]
+                        ledger.movement_slots.append(slot)
+                        ledger.movement_cents.append(movement)
+
+    def save_scheduled_transfer(self, scheduled: ScheduledTransfer):
+        """Guarda o actualiza una transferencia programada."""
+        is_new = scheduled.id not in _scheduled_transfers_db
+        # Primero la tabla y luego los índices: quien recorre un índice siempre
+        # encuentra la transferencia de cada ID.
+        _scheduled_transfers_db[scheduled.id] = scheduled
+        if is_new:
+            _scheduled_order.append(scheduled.id)
+            for account_id in (
+                scheduled.source_account_id,
+                scheduled.destination_account_id,
+            ):
+                _scheduled_by_account.setdefault(account_id, []).append(scheduled.id)
+
+    def update_scheduled_transfer_status(
+        self,
+        scheduled_id: UUID,
+        expected: ScheduledTransferStatus,
+        new_status: ScheduledTransferStatus,
+    ) -> bool:
+        """
+        Cambia el estado de una transferencia programada solo si sigue en el
+        estado esperado, de forma atómica (como un UPDATE ... WHERE status = ...).
+
+        Returns:
+            False si no existe o su estado ya no es el esperado.
+        """
+        with _scheduled_lock:
+            scheduled = _scheduled_transfers_db.get(scheduled_id)
+            if scheduled is None or scheduled.status != expected:
+                return False
+            scheduled.status = new_status
+            return True
+
+    def get_scheduled_transfer_by_id(
+        self, scheduled_id: UUID
+    ) -> ScheduledTransfer | None:
+        """Busca una transferencia programada por su UUID."""
+        return _scheduled_transfers_db.get(scheduled_id)
+
+    def get_scheduled_transfers(
+        self,
+        account_id: UUID | None = None,
+        status: ScheduledTransferStatus | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> List[ScheduledTransfer]:
+        """
+        Devuelve las transferencias programadas, en orden de creación, filtradas
+        por cuenta y/o estado. Con cuenta, solo se recorren las suyas (índice
+        por cuenta); sin límite, se devuelven todas las que cumplen el filtro.
+        Los índices se recorren sin copiarlos y solo hasta completar la página.
+        """
+        if account_id is None:
+            ids = _scheduled_order
+        else:
+            ids = _scheduled_by_account.get(account_id, [])
+        matching = (
+            scheduled
+            for scheduled in map(_scheduled_transfers_db.__getitem__, ids)
+            if status is None or scheduled.status == status
+        )
+        stop = None if limit is None else offset + limit
+        return list(islice(matching, offset, stop))
+
+    def get_partition_checksums(self) -> List[int]:
+        """Devuelve una copia de los checksums actuales de cada partición."""
+        with _checksum_lock:
+            return list(_partition_checksums)
+
+    def get_verified_partitions(self) -> Dict[int, VerifiedPartition]:
+        """Devuelve el resultado de la última conciliación correcta de cada partición."""
+        return dict(_verified_partitions)
+
+    def save_verified_partitions(self, verified: Dict[int, VerifiedPartition]):
+        """Registra las particiones que han superado la conciliación."""
+        _verified_partitions.update(verified)
+
+    @contextmanager
+    def ledger_update(self) -> Iterator[None]:
+        """
+        Delimita un movimiento de saldos (cargo, abono y transacción COMPLETED).
+        Varios pueden ejecutarse a la vez; solo se excluyen con ledger_snapshot().
+        """
+        with _ledger_lock.shared():
+            yield
+
+    @contextmanager
+    def ledger_snapshot(self) -> Iterator[None]:
+        """
+        Espera a que terminen los movimientos de saldos en curso y no deja
+        empezar otros mientras dura el bloque `with`, para que la conciliación
+        lea un estado coherente del libro mayor.
+        """
+        with _ledger_lock.exclusive():
+            yield
+
+    def get_partition_snapshot(self, partition: int) -> PartitionSnapshot:
+        """Copia los datos de conciliación de una partición."""
+        ledger = _ledger_partitions[partition]
+        with _index_lock, _checksum_lock:
+            snapshot = PartitionSnapshot(
+                list(ledger.account_ids),
+                ledger.openings[:],
+                ledger.balances[:],
+                ledger.movement_slots[:],
+                ledger.movement_cents[:],
+            )
+            # El saldo de las cuentas fragmentadas está en sus slots.
+            for account_id, sharded in list(_sharded_balances.items()):
+                if partition_of(account_id) == partition:
+                    snapshot.balances[_ledger_slots[account_id]] = _to_cents(
+                        sharded.total()
+                    )
+        return snapshot
+
+    def get_sharded_account_ids(self) -> List[UUID]:
+        """Devuelve los IDs de las cuentas con saldo fragmentado."""
+        return list(_sharded_balances)
 
     def get_transactions_for_account(self, account_id: UUID) -> List[Transaction]:
         """Busca todas las transacciones de una cuenta (como origen o destino)."""
@@ -0,0 +1,195 @@
+# db/indexes.py
+
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Iterator, List
+
+# Número de claves por bloque. Con bloques de este tamaño, insertar o borrar
+# solo desplaza unos pocos miles de punteros en lugar de millones.
+_DEFAULT_LOAD = 1000
+
+
+def normalize_owner_name(name: str) -> str:
+    """
+    Normaliza un nombre de titular para búsquedas: sin tildes, sin distinción
+    de mayúsculas/minúsculas y con los espacios colapsados.
+    Ej: "  Martín   VARGAS " -> "martin vargas".
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(without_accents.casefold().split())
+
+
+class SortedKeyIndex:
+    """
+    Índice ordenado en memoria con estadísticas de orden.
+
+    Guarda las claves repartidas en bloques ordenados (una "lista ordenada por
+    bloques"), de modo que insertar y borrar cuesta O(√n) y no O(n). Un árbol de
+    Fenwick sobre el tamaño de los bloques permite calcular en O(log n) el rango
+    (posición) de una clave, y por tanto contar cuántas claves hay en un
+    intervalo o saltar directamente a la posición N sin recorrer las anteriores.
+
+    Las claves deben ser comparables entre sí y únicas; en la práctica son
+    tuplas (valor, id_de_cuenta).
+    """
+
+    def __init__(self, load: int = _DEFAULT_LOAD):
+        self._load = load
+        self._lists: List[List[Any]] = []
+        self._maxes: List[Any] = []
+        self._len = 0
+        # Árbol de Fenwick sobre len(self._lists[i]). Se reconstruye de forma
+        # perezosa tras cambios estructurales (división o borrado de bloques).
+        self._tree: List[int] | None = None
+
+    def __len__(self) -> int:
+        return self._len
+
+    # --- Modificación ---
+
+    def add(self, key: Any):
+        """Inserta una clave en el índice."""
+        if not self._maxes:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._tree = None
+            self._len = 1
+            return
+
+        pos = bisect_right(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._lists[pos].append(key)
+            self._maxes[pos] = key
+        else:
+            insort(self._lists[pos], key)
+        self._len += 1
+
+        if len(self._lists[pos]) > 2 * self._load:
+            self._split(pos)
+        else:
+            self._tree_update(pos, 1)
+
+    def remove(self, key: Any):
+        """
+        Elimina una clave del índice.
+
+        Raises:
+            KeyError: Si la clave no está en el índice.
+        """
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            raise KeyError(key)
+        block = self._lists[pos]
+        idx = bisect_left(block, key)
+        if idx == len(block) or block[idx] != key:
+            raise KeyError(key)
+
+        del block[idx]
+        self._len -= 1
+        if not block:
+            del self._lists[pos]
+            del self._maxes[pos]
+            self._tree = None
+        else:
+            self._maxes[pos] = block[-1]
+            self._tree_update(pos, -1)
+
+    def _split(self, pos: int):
+        block = self._lists[pos]
+        half = block[self._load :]
+        del block[self._load :]
+        self._maxes[pos] = block[-1]
+        self._lists.insert(pos + 1, half)
+        self._maxes.insert(pos + 1, half[-1])
+        self._tree = None
+
+    # --- Árbol de Fenwick sobre el tamaño de los bloques ---
+
+    def _build_tree(self) -> List[int]:
+        tree = [len(block) for block in self._lists]
+        size = len(tree)
+        for i in range(size):
+            parent = i | (i + 1)
+            if parent < size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _tree_update(self, pos: int, delta: int):
+        tree = self._tree
+        if tree is None:
+            return
+        size = len(tree)
+        while pos < size:
+            tree[pos] += delta
+            pos |= pos + 1
+
+    def _blocks_before(self, pos: int) -> int:
+        """Número total de claves en los bloques [0, pos)."""
+        tree = self._tree if self._tree is not None else self._build_tree()
+        total = 0
+        pos -= 1
+        while pos >= 0:
+            total += tree[pos]
+            pos = (pos & (pos + 1)) - 1
+        return total
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """Convierte una posición global en (bloque, posición dentro del bloque)."""
+        tree = self._tree if self._tree is not None else self._build_tree()
+        pos = -1
+        step = 1 << (len(tree).bit_length())
+        while step:
+            nxt = pos + step
+            if nxt < len(tree) and tree[nxt] <= index:
+                index -= tree[nxt]
+                pos = nxt
+            step >>= 1
+        return pos + 1, index
+
+    # --- Consultas ---
+
+    def rank_left(self, key: Any) -> int:
+        """Número de claves estrictamente menores que `key`."""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return self._len
+        return self._blocks_before(pos) + bisect_left(self._lists[pos], key)
+
+    def rank_right(self, key: Any) -> int:
+        """Número de claves menores o iguales que `key`."""
+        pos = bisect_right(self._maxes, key)
+        if pos == len(self._maxes):
+            return self._len
+        return self._blocks_before(pos) + bisect_right(self._lists[pos], key)
+
+    def count(self, min_key: Any = None, max_key: Any = None) -> int:
+        """Número de claves en el intervalo cerrado [min_key, max_key]."""
+        start = 0 if min_key is None else self.rank_left(min_key)
+        stop = self._len if max_key is None else self.rank_right(max_key)
+        return max(0, stop - start)
+
+    def irange(
+        self, min_key: Any = None, max_key: Any = None, skip: int = 0
+    ) -> Iterator[Any]:
+        """
+        Itera en orden las claves del intervalo cerrado [min_key, max_key],
+        saltándose las `skip` primeras sin recorrerlas.
+        """
+        start = 0 if min_key is None else self.rank_left(min_key)
+        start += skip
+        if start >= self._len:
+            return
+        pos, idx = self._locate(start)
+        lists = self._lists
+        while pos < len(lists):
+            block = lists[pos]
+            for i in range(idx, len(block)):
+                key = block[i]
+                if max_key is not None and key > max_key:
+                    return
+                yield key
+            pos += 1
+            idx = 0
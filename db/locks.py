@@ -0,0 +1,53 @@
+# db/locks.py
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class SharedExclusiveLock:
+    """
+    Lock de lectores/escritor: muchos hilos pueden tenerlo a la vez en modo
+    compartido, y el modo exclusivo espera a que salgan todos ellos.
+
+    Un hilo que espera el modo exclusivo impide nuevas entradas en modo
+    compartido, para que un flujo continuo de lectores no lo deje esperando
+    indefinidamente. No es reentrante.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._shared = 0
+        self._exclusive = False
+        self._exclusive_waiting = 0
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        """Mantiene el lock en modo compartido mientras dura el bloque `with`."""
+        with self._condition:
+            while self._exclusive or self._exclusive_waiting:
+                self._condition.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                if not self._shared:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Mantiene el lock en modo exclusivo mientras dura el bloque `with`."""
+        with self._condition:
+            self._exclusive_waiting += 1
+            while self._exclusive or self._shared:
+                self._condition.wait()
+            self._exclusive_waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
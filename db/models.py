@@ -58,3 +58,43 @@ class Transaction(BaseModel):
     def amount_must_have_two_decimal_places(cls, v):
         """Asegura que el monto siempre tenga 2 decimales."""
         return v.quantize(Decimal("0.01"))
+
+
+class ScheduledTransferStatus(str, Enum):
+    """
+    Define los estados posibles de una transferencia programada. A diferencia
+    de una transacción, una transferencia programada puede cancelarse.
+    RUNNING indica que se está ejecutando y ya no puede cancelarse.
+    """
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+class ScheduledTransfer(BaseModel):
+    """
+    Representa una transferencia programada para una fecha futura, opcionalmente
+    recurrente. Permanece en estado PENDING hasta su última ejecución.
+    """
+
+    id: UUID = Field(default_factory=uuid4)
+    source_account_id: UUID
+    destination_account_id: UUID
+    amount: Decimal = Field(gt=0)
+
+    execute_at: datetime  # Próxima ejecución (UTC).
+    # Si se indica, la transferencia se repite cada `interval_seconds` segundos.
+    interval_seconds: int | None = Field(default=None, ge=1)
+
+    status: ScheduledTransferStatus = ScheduledTransferStatus.PENDING
+    last_transaction_id: UUID | None = None
+    last_error: str | None = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    @validator("amount")
+    def amount_must_have_two_decimal_places(cls, v):
+        """Asegura que el monto siempre tenga 2 decimales."""
+        return v.quantize(Decimal("0.01"))
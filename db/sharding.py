@@ -0,0 +1,82 @@
+# db/sharding.py
+
+import itertools
+import threading
+from decimal import Decimal
+from typing import List
+
+
+class ShardedBalance:
+    """
+    Saldo de una cuenta repartido en N sub-saldos ("slots") independientes.
+
+    Pensado para cuentas muy calientes (p. ej. comercios) que reciben una gran
+    parte de las transferencias: cada abono elige un slot por turno rotatorio y
+    solo bloquea ese slot, de modo que abonos concurrentes no compiten entre sí.
+    Los cargos, en cambio, bloquean todos los slots para comprobar el saldo
+    agregado y descontarlo de forma atómica.
+    """
+
+    def __init__(self, initial_balance: Decimal, slots: int):
+        if slots < 1:
+            raise ValueError("El número de slots debe ser al menos 1.")
+        self._slots: List[Decimal] = [Decimal("0.00")] * slots
+        self._slots[0] = initial_balance
+        self._locks = [threading.Lock() for _ in range(slots)]
+        self._cursor = itertools.count()
+        # Contador de versión al estilo "seqlock": es impar mientras un cargo
+        # está modificando varios slots, para que las lecturas sin bloqueo
+        # nunca observen un saldo a medio descontar.
+        self._version = 0
+
+    @property
+    def slot_count(self) -> int:
+        return len(self._slots)
+
+    def credit(self, amount: Decimal):
+        """Abona un monto en uno de los slots, bloqueando solo ese slot."""
+        slot = next(self._cursor) % len(self._slots)
+        with self._locks[slot]:
+            self._slots[slot] += amount
+
+    def try_debit(self, amount: Decimal) -> bool:
+        """
+        Descuenta un monto del saldo agregado si hay fondos suficientes.
+
+        Returns:
+            False si el saldo agregado es menor que el monto (no se modifica nada).
+        """
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            if sum(self._slots, Decimal("0.00")) < amount:
+                return False
+            self._version += 1
+            remaining = amount
+            for slot, value in enumerate(self._slots):
+                taken = min(value, remaining)
+                self._slots[slot] = value - taken
+                remaining -= taken
+                if not remaining:
+                    break
+            self._version += 1
+            return True
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def total(self) -> Decimal:
+        """Devuelve el saldo agregado (la suma de todos los slots)."""
+        version = self._version
+        if version % 2 == 0:
+            total = sum(self._slots, Decimal("0.00"))
+            if self._version == version:
+                return total
+        # Un cargo estaba en curso: leemos bajo bloqueo para tener un valor consistente.
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            return sum(self._slots, Decimal("0.00"))
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
@@ -1,14 +1,63 @@
 # main.py
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from api.routes import router as api_router
 from core.config import settings
+from db.database import DatabaseSession
+from services.reconciliation_service import start_worker_pool, stop_worker_pool
+from services.transaction_service import TransactionService
+
+
+async def run_transfer_scheduler():
+    """
+    Tarea en segundo plano que ejecuta en cada tick las transferencias vencidas.
+
+    Los lotes se ejecutan en el threadpool, de uno en uno y con un tamaño
+    máximo, para que un tick con muchas transferencias vencidas no bloquee el
+    event loop (ni las peticiones HTTP ni los streams SSE) mientras dura.
+    """
+    batch_size = settings.SCHEDULER_BATCH_SIZE
+    while True:
+        await asyncio.sleep(settings.SCHEDULER_TICK_SECONDS)
+        try:
+            service = TransactionService(DatabaseSession())
+            # Un lote completo indica que puede haber más vencidas en cola.
+            while (
+                await run_in_threadpool(service.execute_due_transfers, None, batch_size)
+                == batch_size
+            ):
+                pass
+        except Exception as e:
+            # Un error inesperado no debe detener el planificador.
+            print(f"Error en el planificador de transferencias: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Al arrancar, reconstruimos el planificador a partir de las transferencias
+    # programadas guardadas, para no perder ninguna tras un reinicio.
+    TransactionService(DatabaseSession()).rebuild_transfer_schedule()
+    # El pool de la conciliación vive lo mismo que la aplicación.
+    start_worker_pool(settings.RECONCILIATION_WORKERS)
+    scheduler_task = asyncio.create_task(run_transfer_scheduler())
+    yield
+    scheduler_task.cancel()
+    # Se espera a que termine el lote en curso antes de cerrar.
+    with suppress(asyncio.CancelledError):
+        await scheduler_task
+    stop_worker_pool()
+
 
 # Creación de la instancia principal de la aplicación FastAPI
 app = FastAPI(
     title=settings.APP_NAME,
     version="1.0.0",
     description="API para el procesamiento seguro de transacciones financieras.",
+    lifespan=lifespan,
 )
 
 
@@ -0,0 +1,196 @@
+# services/event_hub.py
+
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, Set
+from uuid import UUID
+
+from db.models import Transaction
+
+# Tamaño por defecto del buffer de cada suscriptor. Si un consumidor lento
+# acumula más eventos pendientes que este límite, se le desconecta.
+DEFAULT_BUFFER_SIZE = 256
+
+
+class Subscription:
+    """
+    Representa a un consumidor suscrito a los eventos de una o varias cuentas.
+
+    Cada suscripción tiene un buffer acotado de eventos ya serializados. Cuando
+    el buffer se llena, la suscripción se cierra (política de desconexión) para
+    que un consumidor lento no haga crecer la memoria del servidor sin límite.
+
+    Las transacciones se crean también desde hilos del threadpool, así que
+    push() y close() pueden llamarse desde cualquier hilo: el buffer se protege
+    con un lock y el aviso al consumidor se entrega a su event loop con
+    call_soon_threadsafe, ya que asyncio.Event no es thread-safe.
+    """
+
+    def __init__(self, account_ids: Iterable[UUID], max_buffer: int):
+        self.account_ids = frozenset(account_ids)
+        self.max_buffer = max_buffer
+        self.closed = False
+        self.overflowed = False
+        self._buffer: Deque[bytes] = deque()
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+        try:
+            # Loop del consumidor; None si la suscripción se crea fuera de un loop.
+            self._loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    def push(self, frame: bytes) -> bool:
+        """
+        Encola un evento ya serializado.
+
+        Returns:
+            False si el buffer estaba lleno y la suscripción ha sido cerrada.
+        """
+        with self._lock:
+            if self.closed:
+                return False
+            accepted = len(self._buffer) < self.max_buffer
+            if accepted:
+                self._buffer.append(frame)
+            else:
+                self.overflowed = True
+                self.closed = True
+        self._wake()
+        return accepted
+
+    def close(self):
+        """Marca la suscripción como cerrada y despierta al consumidor."""
+        with self._lock:
+            self.closed = True
+        self._wake()
+
+    def _wake(self):
+        """Despierta al consumidor desde cualquier hilo."""
+        loop = self._loop
+        if loop is None:
+            self._ready.set()
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._ready.set()
+            return
+        try:
+            loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # El loop ya se cerró: no queda ningún consumidor al que avisar.
+            pass
+
+    def pending(self) -> int:
+        """Número de eventos en el buffer pendientes de entregar."""
+        return len(self._buffer)
+
+    def drain(self) -> list[bytes]:
+        """Devuelve y vacía todos los eventos pendientes sin esperar."""
+        with self._lock:
+            frames = list(self._buffer)
+            self._buffer.clear()
+            self._ready.clear()
+        return frames
+
+    async def next_batch(self, timeout: float | None = None) -> list[bytes]:
+        """
+        Espera hasta que haya eventos pendientes (o hasta el timeout) y los
+        devuelve todos de una vez. Devuelve una lista vacía si vence el timeout
+        o si la suscripción se ha cerrado sin eventos pendientes.
+        """
+        if not self._buffer and not self.closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        return self.drain()
+
+
+class TransactionEventHub:
+    """
+    Hub pub/sub en proceso para los eventos de transacciones completadas.
+
+    Los suscriptores se indexan por ID de cuenta, de modo que publicar un evento
+    solo toca a los suscriptores de la cuenta de origen y de destino. Cada evento
+    se serializa una única vez y el mismo frame se comparte entre todos los
+    suscriptores que lo reciben. Se puede publicar desde cualquier hilo.
+    """
+
+    def __init__(self, max_buffer: int = DEFAULT_BUFFER_SIZE):
+        self.max_buffer = max_buffer
+        self._subscribers: Dict[UUID, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, account_ids: Iterable[UUID]) -> Subscription:
+        """Crea una suscripción a los eventos de las cuentas indicadas."""
+        subscription = Subscription(account_ids, self.max_buffer)
+        with self._lock:
+            for account_id in subscription.account_ids:
+                self._subscribers.setdefault(account_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Elimina una suscripción del hub y la cierra."""
+        subscription.close()
+        with self._lock:
+            for account_id in subscription.account_ids:
+                subscribers = self._subscribers.get(account_id)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[account_id]
+
+    def subscriber_count(self) -> int:
+        """Número de suscripciones activas (distintas) en el hub."""
+        unique = set()
+        with self._lock:
+            for subscribers in self._subscribers.values():
+                unique.update(subscribers)
+        return len(unique)
+
+    def publish(self, transaction: Transaction) -> int:
+        """
+        Publica una transacción a los suscriptores de sus cuentas de origen y destino.
+
+        Args:
+            transaction: La transacción completada.
+
+        Returns:
+            El número de suscriptores a los que se entregó el evento.
+        """
+        source = self._subscribers.get(transaction.source_account_id)
+        destination = self._subscribers.get(transaction.destination_account_id)
+        if not source and not destination:
+            # Camino rápido: nadie escucha, no se paga el coste de serializar.
+            return 0
+
+        with self._lock:
+            # Un suscriptor de ambas cuentas debe recibir el evento una sola vez.
+            # Se copia bajo el lock porque otro hilo puede estar modificando los sets.
+            targets = set(source or ())
+            targets.update(destination or ())
+
+        frame = self.format_event(transaction)
+        delivered = 0
+        for subscription in targets:
+            if subscription.push(frame):
+                delivered += 1
+            else:
+                self.unsubscribe(subscription)
+        return delivered
+
+    @staticmethod
+    def format_event(transaction: Transaction) -> bytes:
+        """Serializa una transacción como un frame de Server-Sent Events."""
+        payload = transaction.model_dump_json()
+        return f"id: {transaction.id}\nevent: transaction\ndata: {payload}\n\n".encode()
+
+
+# Instancia única del hub compartida por toda la aplicación.
+transaction_event_hub = TransactionEventHub()
@@ -0,0 +1,226 @@
+# services/reconciliation_service.py
+
+import multiprocessing
+import time
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from decimal import Decimal
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from db.database import (
+    RECONCILIATION_PARTITIONS,
+    DatabaseSession,
+    PartitionSnapshot,
+    VerifiedPartition,
+    partition_of,
+)
+
+# Por debajo de este número de movimientos no compensa repartir el trabajo
+# entre procesos: cuesta más enviar los datos que procesarlos aquí.
+PARALLEL_THRESHOLD = 20_000
+
+
+class BalanceMismatch(BaseModel):
+    """Cuenta cuyo saldo no cuadra con su saldo inicial más sus movimientos."""
+
+    account_id: UUID
+    expected_balance: Decimal
+    actual_balance: Decimal
+
+
+class ReconciliationReport(BaseModel):
+    """Resultado de una ejecución de la conciliación del libro mayor."""
+
+    checked_partitions: int
+    skipped_partitions: int
+    checked_accounts: int
+    movements_scanned: int
+    mismatches: list[BalanceMismatch]
+    total_opening_balance: Decimal
+    total_balance: Decimal
+    money_conserved: bool
+    duration_seconds: float
+
+
+# --- Trabajo ejecutado en los procesos del pool ---
+# Cada tarea recibe los arrays de una partición (se serializan casi como una
+# copia de memoria) y devuelve solo las discrepancias y los totales.
+PartitionResult = Tuple[List[Tuple[int, int, int]], int, int]
+
+
+def _check_partition(
+    openings: array, balances: array, movement_slots: array, movement_cents: array
+) -> PartitionResult:
+    """
+    Suma los movimientos de cada cuenta de la partición y compara su saldo
+    esperado con el real, todo en céntimos.
+
+    Returns:
+        (discrepancias como (posición, esperado, real), total inicial, total actual).
+    """
+    deltas = [0] * len(openings)
+    for slot, cents in zip(movement_slots, movement_cents):
+        deltas[slot] += cents
+    mismatches = [
+        (slot, opening + delta, balance)
+        for slot, (opening, delta, balance) in enumerate(
+            zip(openings, deltas, balances)
+        )
+        if opening + delta != balance
+    ]
+    return mismatches, sum(openings), sum(balances)
+
+
+def create_worker_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Crea un pool de procesos para la conciliación.
+
+    Usa "forkserver" (o "spawn" si no está disponible) en lugar de "fork":
+    el servidor es multihilo, y un fork desde uno de sus hilos puede dejar en
+    el hijo locks tomados por hilos que ya no existen.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+# Pool compartido por toda la aplicación. Lo crea y lo cierra el lifespan
+# (ver main.py), de modo que los procesos se arrancan una sola vez.
+_worker_pool: ProcessPoolExecutor | None = None
+
+
+def start_worker_pool(workers: int):
+    """Crea el pool compartido. Con un solo worker la conciliación se hace en el proceso."""
+    global _worker_pool
+    if workers > 1 and _worker_pool is None:
+        _worker_pool = create_worker_pool(workers)
+
+
+def stop_worker_pool():
+    """Cierra el pool compartido, si existe."""
+    global _worker_pool
+    if _worker_pool is not None:
+        _worker_pool.shutdown(cancel_futures=True)
+        _worker_pool = None
+
+
+def _from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+class ReconciliationService:
+    """
+    Concilia el libro mayor: comprueba que el saldo de cada cuenta es igual a
+    su saldo inicial más los abonos y menos los cargos de todas sus
+    transacciones COMPLETED, y que el dinero total se conserva.
+
+    La base de datos mantiene los datos de conciliación agrupados por
+    partición y un checksum incremental por partición, así que una ejecución
+    solo lee las particiones que han cambiado desde su última verificación.
+    Esas particiones se revisan en el pool de procesos cuando el volumen lo
+    justifica.
+    """
+
+    def __init__(self, db_session: DatabaseSession, pool: Executor | None = None):
+        self.db = db_session
+        self.pool = pool if pool is not None else _worker_pool
+
+    def reconcile(self, full: bool = False) -> ReconciliationReport:
+        """
+        Ejecuta la conciliación.
+
+        Args:
+            full: Si es True, revisa todas las particiones aunque no hayan cambiado.
+
+        Returns:
+            Un ReconciliationReport con las cuentas que no cuadran.
+        """
+        started = time.perf_counter()
+        # La foto se toma sin movimientos de saldo a medias: una transferencia
+        # con el cargo hecho y el abono pendiente parecería una discrepancia.
+        with self.db.ledger_snapshot():
+            checksums = self.db.get_partition_checksums()
+            verified = self.db.get_verified_partitions()
+            # Los abonos a cuentas con saldo fragmentado no pasan por
+            # save_account, así que sus particiones se revisan siempre.
+            always = {partition_of(a) for a in self.db.get_sharded_account_ids()}
+            snapshots = {
+                p: self.db.get_partition_snapshot(p)
+                for p in range(RECONCILIATION_PARTITIONS)
+                if full
+                or p in always
+                or p not in verified
+                or verified[p].checksum != checksums[p]
+            }
+
+        results = self._check_partitions(snapshots)
+
+        mismatches: List[BalanceMismatch] = []
+        passed: Dict[int, VerifiedPartition] = {}
+        # Las particiones sin cambios aportan los totales de su última verificación.
+        total_opening = sum(
+            v.opening_cents for p, v in verified.items() if p not in snapshots
+        )
+        total_balance = sum(
+            v.balance_cents for p, v in verified.items() if p not in snapshots
+        )
+        for partition, (found, opening, balance) in results.items():
+            total_opening += opening
+            total_balance += balance
+            account_ids = snapshots[partition].account_ids
+            for slot, expected, actual in found:
+                mismatches.append(
+                    BalanceMismatch(
+                        account_id=account_ids[slot],
+                        expected_balance=_from_cents(expected),
+                        actual_balance=_from_cents(actual),
+                    )
+                )
+            # Solo se dan por buenas las particiones sin discrepancias, para que
+            # las que fallan se vuelvan a revisar en la siguiente ejecución.
+            if not found:
+                passed[partition] = VerifiedPartition(
+                    checksums[partition], opening, balance
+                )
+        self.db.save_verified_partitions(passed)
+
+        return ReconciliationReport(
+            checked_partitions=len(snapshots),
+            skipped_partitions=RECONCILIATION_PARTITIONS - len(snapshots),
+            checked_accounts=sum(len(s.account_ids) for s in snapshots.values()),
+            movements_scanned=sum(len(s.movement_slots) for s in snapshots.values()),
+            mismatches=mismatches,
+            total_opening_balance=_from_cents(total_opening),
+            total_balance=_from_cents(total_balance),
+            money_conserved=total_opening == total_balance,
+            duration_seconds=time.perf_counter() - started,
+        )
+
+    def _check_partitions(
+        self, snapshots: Dict[int, PartitionSnapshot]
+    ) -> Dict[int, PartitionResult]:
+        """Revisa cada partición, en el pool de procesos si el volumen lo justifica."""
+        movements = sum(len(s.movement_slots) for s in snapshots.values())
+        if self.pool is None or movements < PARALLEL_THRESHOLD:
+            return {
+                partition: _check_partition(
+                    s.openings, s.balances, s.movement_slots, s.movement_cents
+                )
+                for partition, s in snapshots.items()
+            }
+        futures = {
+            partition: self.pool.submit(
+                _check_partition,
+                s.openings,
+                s.balances,
+                s.movement_slots,
+                s.movement_cents,
+            )
+            for partition, s in snapshots.items()
+        }
+        return {partition: future.result() for partition, future in futures.items()}
@@ -0,0 +1,205 @@
+# services/risk_engine.py
+
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
+from uuid import UUID
+
+from core.config import VelocityRuleConfig, settings
+from core.exceptions import TransferLimitExceededError
+
+# Duración total y tamaño de bucket (en segundos) de cada ventana deslizante.
+# La ventana efectiva abarca el bucket actual más los N-1 anteriores.
+WINDOWS: Dict[str, Tuple[int, int]] = {
+    "minute": (60, 1),
+    "hour": (3600, 60),
+    "day": (86400, 3600),
+}
+
+_ZERO = Decimal("0.00")
+
+
+class SlidingWindowCounter:
+    """
+    Contador de ventana deslizante implementado como un buffer circular de
+    buckets de tiempo. Mantiene los totales de forma incremental: al avanzar el
+    tiempo solo se vacían los buckets caducados, así que consultar y registrar
+    cuesta O(1) amortizado, sin importar cuántos eventos haya en la ventana.
+    """
+
+    __slots__ = ("bucket_seconds", "counts", "amounts", "head", "count", "amount")
+
+    def __init__(self, span_seconds: int, bucket_seconds: int):
+        buckets = span_seconds // bucket_seconds
+        self.bucket_seconds = bucket_seconds
+        self.counts: List[int] = [0] * buckets
+        self.amounts: List[Decimal] = [_ZERO] * buckets
+        self.head = 0  # Último bucket (en "épocas" de bucket_seconds) visto.
+        self.count = 0
+        self.amount = _ZERO
+
+    def _advance(self, now: float) -> int:
+        epoch = int(now // self.bucket_seconds)
+        if epoch <= self.head:
+            # Si el reloj retrocede, se sigue acumulando en el bucket actual.
+            return self.head
+        size = len(self.counts)
+        if epoch - self.head >= size:
+            self.counts = [0] * size
+            self.amounts = [_ZERO] * size
+            self.count = 0
+            self.amount = _ZERO
+        else:
+            for expired in range(self.head + 1, epoch + 1):
+                slot = expired % size
+                self.count -= self.counts[slot]
+                self.amount -= self.amounts[slot]
+                self.counts[slot] = 0
+                self.amounts[slot] = _ZERO
+        self.head = epoch
+        return epoch
+
+    def totals(self, now: float) -> Tuple[int, Decimal]:
+        """Devuelve (número de eventos, suma de montos) dentro de la ventana."""
+        self._advance(now)
+        return self.count, self.amount
+
+    def add(self, now: float, amount: Decimal = _ZERO):
+        """Registra un evento con su monto en el bucket actual."""
+        slot = self._advance(now) % len(self.counts)
+        self.counts[slot] += 1
+        self.amounts[slot] += amount
+        self.count += 1
+        self.amount += amount
+
+
+class _CompiledRule:
+    """Regla de velocidad ya validada y asociada al índice de su ventana."""
+
+    __slots__ = ("name", "window", "max_count", "max_amount", "max_new_destinations")
+
+    def __init__(self, config: VelocityRuleConfig, window: int):
+        self.name = config.name
+        self.window = window
+        self.max_count = config.max_count
+        self.max_amount = config.max_amount
+        self.max_new_destinations = config.max_new_destinations
+
+
+class _SourceState:
+    """Contadores de velocidad de una cuenta de origen."""
+
+    __slots__ = ("lock", "transfers", "new_destinations", "known_destinations")
+
+    def __init__(self, windows: List[Tuple[int, int]]):
+        self.lock = threading.Lock()
+        self.transfers = [SlidingWindowCounter(*w) for w in windows]
+        self.new_destinations = [SlidingWindowCounter(*w) for w in windows]
+        self.known_destinations: Set[UUID] = set()
+
+
+class RiskEngine:
+    """
+    Motor de reglas de riesgo previo a las transferencias.
+
+    Las reglas se compilan una sola vez al crear el motor: se agrupan por
+    ventana para que cada cuenta de origen tenga un único contador por ventana,
+    compartido por todas las reglas que la usan. Comprobar una transferencia
+    y registrarla consultan y actualizan esos contadores en O(1), sin
+    recorrer el historial.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[VelocityRuleConfig],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        window_names: List[str] = []
+        self._rules: List[_CompiledRule] = []
+        for config in rules:
+            if config.window not in window_names:
+                window_names.append(config.window)
+            self._rules.append(_CompiledRule(config, window_names.index(config.window)))
+        self._windows = [WINDOWS[name] for name in window_names]
+        self._states: Dict[UUID, _SourceState] = {}
+
+    def _state_for(self, account_id: UUID) -> _SourceState:
+        state = self._states.get(account_id)
+        if state is None:
+            # setdefault es atómico: dos hilos nunca crean estados distintos.
+            state = self._states.setdefault(account_id, _SourceState(self._windows))
+        return state
+
+    def reset(self):
+        """Olvida los contadores y destinatarios conocidos de todas las cuentas."""
+        self._states = {}
+
+    @contextmanager
+    def guard_transfer(
+        self, source_account_id: UUID, destination_account_id: UUID, amount: Decimal
+    ) -> Iterator[None]:
+        """
+        Comprueba todas las reglas para una transferencia y la registra si el
+        bloque `with` termina sin errores.
+
+        El estado de la cuenta de origen queda bloqueado durante todo el bloque,
+        así que dos transferencias de la misma cuenta nunca pasan la comprobación
+        a la vez, aunque la cuenta tenga el saldo fragmentado y su fila no se
+        bloquee. Si el bloque lanza una excepción (la transferencia falla al
+        mover el dinero), no se registra nada y no se consume límite.
+
+        Raises:
+            TransferLimitExceededError: Si la transferencia supera alguna regla.
+        """
+        if not self._rules:
+            yield
+            return
+        state = self._state_for(source_account_id)
+        with state.lock:
+            self._check(state, source_account_id, destination_account_id, amount)
+            yield
+            self._record(state, destination_account_id, amount)
+
+    def _check(
+        self,
+        state: _SourceState,
+        source_account_id: UUID,
+        destination_account_id: UUID,
+        amount: Decimal,
+    ):
+        now = self._clock()
+        is_new_destination = destination_account_id not in state.known_destinations
+        for rule in self._rules:
+            count, total = state.transfers[rule.window].totals(now)
+            if rule.max_count is not None and count + 1 > rule.max_count:
+                self._reject(rule, "número de transferencias", source_account_id)
+            if rule.max_amount is not None and total + amount > rule.max_amount:
+                self._reject(rule, "monto transferido", source_account_id)
+            if is_new_destination and rule.max_new_destinations is not None:
+                new_count, _ = state.new_destinations[rule.window].totals(now)
+                if new_count + 1 > rule.max_new_destinations:
+                    self._reject(rule, "destinatarios nuevos", source_account_id)
+
+    def _record(
+        self, state: _SourceState, destination_account_id: UUID, amount: Decimal
+    ):
+        now = self._clock()
+        for counter in state.transfers:
+            counter.add(now, amount)
+        if destination_account_id not in state.known_destinations:
+            for counter in state.new_destinations:
+                counter.add(now)
+            state.known_destinations.add(destination_account_id)
+
+    @staticmethod
+    def _reject(rule: _CompiledRule, limit: str, account_id: UUID):
+        raise TransferLimitExceededError(
+            f"Límite de {limit} excedido para la cuenta {account_id} (regla '{rule.name}')."
+        )
+
+
+# Instancia única del motor, con las reglas de la configuración compiladas al arrancar.
+risk_engine = RiskEngine(settings.VELOCITY_RULES)
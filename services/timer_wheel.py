@@ -0,0 +1,141 @@
+# services/timer_wheel.py
+
+import math
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+
+# Slots por nivel. Con ticks de 1 segundo, los cuatro niveles cubren
+# 256 * 64^3 segundos (unos dos años); lo que queda más lejos espera en una
+# lista de desbordamiento que se revisa cada vez que el último nivel da la vuelta.
+DEFAULT_LEVELS = (256, 64, 64, 64)
+
+_OVERFLOW = -1
+
+
+class TimerWheel:
+    """
+    Rueda de temporizadores jerárquica (hierarchical timing wheel).
+
+    Cada nivel es un array circular de slots; el nivel 0 tiene la resolución de
+    un tick y cada nivel superior agrupa una vuelta completa del anterior.
+    Programar y cancelar cuestan O(1): solo se inserta o borra una entrada en
+    el diccionario de un slot. Al avanzar el reloj, cuando un nivel inferior
+    completa una vuelta, las entradas del slot correspondiente del nivel
+    superior "caen" (cascade) a niveles más finos, hasta llegar al nivel 0 y
+    vencer exactamente en su tick.
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = 1.0,
+        start: float = 0.0,
+        levels: Sequence[int] = DEFAULT_LEVELS,
+    ):
+        self.tick_seconds = tick_seconds
+        self._sizes = list(levels)
+        # _spans[i] = ticks que cubre un slot del nivel i.
+        self._spans = [1]
+        for size in self._sizes[:-1]:
+            self._spans.append(self._spans[-1] * size)
+        self._range = self._spans[-1] * self._sizes[-1]
+        self._levels: List[List[Dict[Hashable, Tuple[int, Any]]]] = [
+            [{} for _ in range(size)] for size in self._sizes
+        ]
+        self._overflow: Dict[Hashable, Tuple[int, Any]] = {}
+        # Dónde está cada entrada (nivel, slot), para poder cancelarla en O(1).
+        self._locations: Dict[Hashable, Tuple[int, int]] = {}
+        # Último tick ya procesado.
+        self.current_tick = self._to_tick(start)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._locations
+
+    def _to_tick(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
+
+    def schedule(self, key: Hashable, deadline: float, payload: Any = None):
+        """
+        Programa (o reprograma) una entrada para que venza en `deadline`.
+        Si la fecha ya ha pasado, vence en el siguiente tick.
+
+        La fecha se redondea hacia arriba al tick siguiente: una entrada puede
+        vencer hasta un tick tarde, pero nunca antes de su fecha.
+        """
+        if key in self._locations:
+            self.cancel(key)
+        tick = math.ceil(deadline / self.tick_seconds)
+        self._place(key, tick, payload, self.current_tick + 1)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Cancela una entrada. Devuelve False si no estaba programada."""
+        location = self._locations.pop(key, None)
+        if location is None:
+            return False
+        level, slot = location
+        if level == _OVERFLOW:
+            del self._overflow[key]
+        else:
+            del self._levels[level][slot][key]
+        return True
+
+    def advance(self, now: float) -> List[Any]:
+        """
+        Avanza el reloj hasta `now` y devuelve los payloads de todas las
+        entradas vencidas, en orden de vencimiento.
+        """
+        target = self._to_tick(now)
+        due: List[Any] = []
+        while self.current_tick < target:
+            if not self._locations:
+                # Rueda vacía: no hay nada que procesar en los ticks intermedios.
+                self.current_tick = target
+                break
+            self.current_tick += 1
+            due.extend(self._process_tick(self.current_tick))
+        return due
+
+    def _place(self, key: Hashable, deadline: int, payload: Any, base: int):
+        """Coloca una entrada en el nivel adecuado; `base` es el primer tick aún no procesado."""
+        deadline = max(deadline, base)
+        delta = deadline - base
+        if delta >= self._range:
+            self._overflow[key] = (deadline, payload)
+            self._locations[key] = (_OVERFLOW, 0)
+            return
+        for level, size in enumerate(self._sizes):
+            span = self._spans[level]
+            if delta < span * size:
+                slot = (deadline // span) % size
+                self._levels[level][slot][key] = (deadline, payload)
+                self._locations[key] = (level, slot)
+                return
+
+    def _cascade(self, level: int, tick: int):
+        """Redistribuye el slot del nivel `level` que empieza en `tick`."""
+        slot = (tick // self._spans[level]) % self._sizes[level]
+        if slot == 0:
+            if level + 1 < len(self._sizes):
+                self._cascade(level + 1, tick)
+            elif self._overflow:
+                overflow, self._overflow = self._overflow, {}
+                for key, (deadline, payload) in overflow.items():
+                    self._place(key, deadline, payload, tick)
+        entries = self._levels[level][slot]
+        if entries:
+            self._levels[level][slot] = {}
+            for key, (deadline, payload) in entries.items():
+                self._place(key, deadline, payload, tick)
+
+    def _process_tick(self, tick: int) -> List[Any]:
+        if tick % self._sizes[0] == 0 and len(self._sizes) > 1:
+            self._cascade(1, tick)
+        slot = tick % self._sizes[0]
+        entries = self._levels[0][slot]
+        if not entries:
+            return []
+        self._levels[0][slot] = {}
+        for key in entries:
+            del self._locations[key]
+        return [payload for _, payload in entries.values()]
@@ -1,16 +1,31 @@
 # services/transaction_service.py
 
+import math
 from uuid import UUID
 from decimal import Decimal
+from datetime import datetime, timedelta, timezone
 
 from db.database import DatabaseSession
-from db.models import Account, Transaction, TransactionStatus
+from db.models import (
+    Account,
+    ScheduledTransfer,
+    ScheduledTransferStatus,
+    Transaction,
+    TransactionStatus,
+)
+from services.event_hub import TransactionEventHub, transaction_event_hub
+from services.risk_engine import RiskEngine, risk_engine as default_risk_engine
+from services.transfer_scheduler import TransferScheduler, transfer_scheduler
 from core.exceptions import (
     AccountNotFoundError,
     InsufficientFundsError,
+    ScheduledTransferNotFoundError,
     SelfTransferError,
 )
 
+# Máximo de sub-saldos permitidos al fragmentar el saldo de una cuenta.
+MAX_BALANCE_SLOTS = 64
+
 
 class TransactionService:
     """
@@ -18,8 +33,21 @@ class TransactionService:
     Opera sobre una sesión de base de datos que se le inyecta al ser instanciada.
     """
 
-    def __init__(self, db_session: DatabaseSession):
+    def __init__(
+        self,
+        db_session: DatabaseSession,
+        event_hub: TransactionEventHub | None = None,
+        risk_engine: RiskEngine | None = None,
+        scheduler: TransferScheduler | None = None,
+    ):
         self.db = db_session
+        # Por defecto se usan el hub, el motor de riesgo y el planificador
+        # compartidos de la aplicación.
+        self.event_hub = event_hub if event_hub is not None else transaction_event_hub
+        self.risk_engine = (
+            risk_engine if risk_engine is not None else default_risk_engine
+        )
+        self.scheduler = scheduler if scheduler is not None else transfer_scheduler
 
     def create_account(self, owner_name: str, balance: Decimal) -> Account:
         """
@@ -64,6 +92,63 @@ class TransactionService:
         """Devuelve una lista de todas las cuentas en el sistema."""
         return self.db.get_all_accounts()
 
+    def search_accounts(
+        self,
+        name_prefix: str | None = None,
+        min_balance: Decimal | None = None,
+        max_balance: Decimal | None = None,
+        created_from: datetime | None = None,
+        created_to: datetime | None = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> list[Account]:
+        """
+        Busca cuentas por prefijo del nombre del titular, rango de saldo y
+        rango de fecha de creación, con paginación.
+
+        Args:
+            name_prefix: Prefijo del nombre (sin distinguir tildes ni mayúsculas).
+            min_balance / max_balance: Rango de saldo (inclusivo).
+            created_from / created_to: Rango de fecha de creación (inclusivo).
+            offset: Número de resultados a omitir.
+            limit: Número máximo de resultados a devolver.
+
+        Returns:
+            Una lista de objetos Account.
+
+        Raises:
+            ValueError: Si algún rango o parámetro de paginación es inválido.
+        """
+        if min_balance is not None and max_balance is not None:
+            if min_balance > max_balance:
+                raise ValueError("El saldo mínimo no puede ser mayor que el máximo.")
+        created_from = self._as_utc(created_from)
+        created_to = self._as_utc(created_to)
+        if created_from is not None and created_to is not None:
+            if created_from > created_to:
+                raise ValueError(
+                    "La fecha inicial no puede ser posterior a la fecha final."
+                )
+        if offset < 0 or limit <= 0:
+            raise ValueError("Parámetros de paginación inválidos.")
+
+        return self.db.search_accounts(
+            name_prefix=name_prefix,
+            min_balance=min_balance,
+            max_balance=max_balance,
+            created_from=created_from,
+            created_to=created_to,
+            offset=offset,
+            limit=limit,
+        )
+
+    @staticmethod
+    def _as_utc(value: datetime | None) -> datetime | None:
+        """Interpreta las fechas sin zona horaria como UTC (igual que created_at)."""
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
     def get_transactions_for_account(self, account_id: UUID) -> list[Transaction]:
         """
         Obtiene el historial de transacciones para una cuenta específica.
@@ -108,44 +193,301 @@ class TransactionService:
         if amount <= 0:
             raise ValueError("El monto de la transacción debe ser positivo.")
 
-        # 3. Obtener cuentas y validar existencia.
-        source_account = self.get_account(source_account_id)
-        destination_account = self.get_account(destination_account_id)
+        # Bloqueamos las filas de ambas cuentas (simula SELECT ... FOR UPDATE) para
+        # que la comprobación de fondos y la actualización de saldos sean atómicas.
+        # Las cuentas con saldo fragmentado no se bloquean (ver _credit/_debit).
+        with self.db.lock_accounts(source_account_id, destination_account_id):
+            # 3. Obtener cuentas y validar existencia.
+            source_account = self.get_account(source_account_id)
+            destination_account = self.get_account(destination_account_id)
+
+            # 4. Validación: Fondos suficientes.
+            if source_account.balance < amount:
+                raise InsufficientFundsError(
+                    f"Saldo insuficiente en la cuenta {source_account_id}."
+                )
+
+            # 4.1. Reglas de riesgo: límites de velocidad de la cuenta de origen.
+            # Solo las transferencias completadas cuentan para los límites, y el
+            # estado de la cuenta queda bloqueado hasta entonces (también si su
+            # saldo está fragmentado y lock_accounts no bloquea su fila).
+            with self.risk_engine.guard_transfer(
+                source_account_id, destination_account_id, amount
+            ):
+                # --- Inicio de la Operación Atómica (Simulada) ---
+                transaction = Transaction(
+                    source_account_id=source_account_id,
+                    destination_account_id=destination_account_id,
+                    amount=amount,
+                )
+                self.db.save_transaction(transaction)  # Guardar en estado PENDING
+
+                # El cargo, el abono y el paso a COMPLETED van juntos respecto a la
+                # conciliación: nunca toma su foto con un movimiento a medias.
+                with self.db.ledger_update():
+                    try:
+                        # 5 y 6. Actualizar y persistir los saldos.
+                        self._debit(source_account, amount)
+                        self._credit(destination_account, amount)
+
+                        # 7. Marcar la transacción como completada.
+                        transaction.status = TransactionStatus.COMPLETED
+                        self.db.save_transaction(transaction)
+
+                        print(f"Transacción completada: {transaction.id}")
+
+                    except Exception as e:
+                        # Si algo falla durante la operación, marcamos la transacción como fallida.
+                        transaction.status = TransactionStatus.FAILED
+                        self.db.save_transaction(transaction)
+                        print(f"Error durante la transacción {transaction.id}: {e}")
+                        # Re-lanzamos la excepción para que la capa superior la maneje.
+                        raise
+
+        # 8. Notificar a los suscriptores en tiempo real. Se hace fuera del bloque
+        # anterior para que un fallo al notificar nunca marque como fallida una
+        # transacción cuyos saldos ya se han actualizado.
+        self.event_hub.publish(transaction)
+        return transaction
+
+    def _debit(self, account: Account, amount: Decimal):
+        """
+        Descuenta un monto del saldo de una cuenta y lo persiste.
+
+        Raises:
+            InsufficientFundsError: Si una cuenta con saldo fragmentado no tiene
+                fondos suficientes en el momento del cargo.
+        """
+        if self.db.is_balance_sharded(account.id):
+            # El cargo comprueba el saldo agregado de forma atómica sobre los slots.
+            if not self.db.try_debit_sharded_balance(account.id, amount):
+                raise InsufficientFundsError(
+                    f"Saldo insuficiente en la cuenta {account.id}."
+                )
+            return
+        account.balance -= amount
+        self.db.save_account(account)
+
+    def _credit(self, account: Account, amount: Decimal):
+        """Abona un monto en el saldo de una cuenta y lo persiste."""
+        if self.db.is_balance_sharded(account.id):
+            self.db.credit_sharded_balance(account.id, amount)
+            return
+        account.balance += amount
+        self.db.save_account(account)
+
+    def enable_balance_sharding(self, account_id: UUID, slots: int) -> Account:
+        """
+        Activa el modo de saldo fragmentado en una cuenta muy concurrida.
+
+        Los abonos a la cuenta se reparten entre `slots` sub-saldos que se
+        actualizan sin competir entre sí; los cargos se siguen validando contra
+        el saldo agregado. El modo no se puede desactivar.
+
+        Args:
+            account_id: El UUID de la cuenta.
+            slots: Número de sub-saldos (entre 2 y MAX_BALANCE_SLOTS).
+
+        Returns:
+            La cuenta, con su saldo agregado.
+
+        Raises:
+            AccountNotFoundError: Si la cuenta no existe.
+            ValueError: Si el número de slots es inválido.
+        """
+        if not 2 <= slots <= MAX_BALANCE_SLOTS:
+            raise ValueError(
+                f"El número de slots debe estar entre 2 y {MAX_BALANCE_SLOTS}."
+            )
+        self.get_account(account_id)
+        self.db.enable_balance_sharding(account_id, slots)
+        return self.get_account(account_id)
+
+    def schedule_transfer(
+        self,
+        source_account_id: UUID,
+        destination_account_id: UUID,
+        amount: Decimal,
+        execute_at: datetime,
+        interval_seconds: int | None = None,
+    ) -> ScheduledTransfer:
+        """
+        Programa una transferencia para una fecha futura, opcionalmente recurrente.
+
+        Args:
+            source_account_id: ID de la cuenta de origen.
+            destination_account_id: ID de la cuenta de destino.
+            amount: El monto a transferir en cada ejecución.
+            execute_at: Fecha futura de la (primera) ejecución. Sin zona horaria se asume UTC.
+            interval_seconds: Si se indica, periodo de repetición en segundos.
+
+        Returns:
+            La transferencia programada, en estado PENDING.
 
-        # 4. Validación: Fondos suficientes.
-        if source_account.balance < amount:
-            raise InsufficientFundsError(
-                f"Saldo insuficiente en la cuenta {source_account_id}."
+        Raises:
+            Varias excepciones de negocio si las validaciones fallan.
+        """
+        if source_account_id == destination_account_id:
+            raise SelfTransferError(
+                "La cuenta de origen y destino no pueden ser la misma."
             )
+        if amount <= 0:
+            raise ValueError("El monto de la transacción debe ser positivo.")
+        if interval_seconds is not None and interval_seconds <= 0:
+            raise ValueError("El intervalo de repetición debe ser positivo.")
+        execute_at = self._as_utc(execute_at)
+        if execute_at.timestamp() <= self.scheduler.now():
+            raise ValueError("La fecha de ejecución debe estar en el futuro.")
+        self.get_account(source_account_id)
+        self.get_account(destination_account_id)
 
-        # --- Inicio de la Operación Atómica (Simulada) ---
-        transaction = Transaction(
+        scheduled = ScheduledTransfer(
             source_account_id=source_account_id,
             destination_account_id=destination_account_id,
             amount=amount,
+            execute_at=execute_at,
+            interval_seconds=interval_seconds,
         )
-        self.db.save_transaction(transaction)  # Guardar en estado PENDING
+        self.db.save_scheduled_transfer(scheduled)
+        self.scheduler.add(scheduled)
+        return scheduled
 
-        try:
-            # 5. Actualizar saldos.
-            source_account.balance -= amount
-            destination_account.balance += amount
+    def get_scheduled_transfer(self, scheduled_id: UUID) -> ScheduledTransfer:
+        """
+        Obtiene una transferencia programada por su ID.
+
+        Raises:
+            ScheduledTransferNotFoundError: Si no existe.
+        """
+        scheduled = self.db.get_scheduled_transfer_by_id(scheduled_id)
+        if not scheduled:
+            raise ScheduledTransferNotFoundError(
+                f"La transferencia programada con ID {scheduled_id} no fue encontrada."
+            )
+        return scheduled
+
+    def get_scheduled_transfers(
+        self,
+        account_id: UUID | None = None,
+        status: ScheduledTransferStatus | None = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> list[ScheduledTransfer]:
+        """
+        Devuelve las transferencias programadas, en orden de creación, filtradas
+        por cuenta y/o estado, con paginación.
 
-            # 6. Persistir los cambios en las cuentas.
-            self.db.save_account(source_account)
-            self.db.save_account(destination_account)
+        Raises:
+            ValueError: Si los parámetros de paginación son inválidos.
+        """
+        if offset < 0 or limit <= 0:
+            raise ValueError("Parámetros de paginación inválidos.")
+        return self.db.get_scheduled_transfers(
+            account_id=account_id, status=status, offset=offset, limit=limit
+        )
 
-            # 7. Marcar la transacción como completada.
-            transaction.status = TransactionStatus.COMPLETED
-            self.db.save_transaction(transaction)
+    def cancel_scheduled_transfer(self, scheduled_id: UUID) -> ScheduledTransfer:
+        """
+        Cancela una transferencia programada pendiente.
 
-            print(f"Transacción completada: {transaction.id}")
-            return transaction
+        El paso a CANCELLED es atómico respecto a la ejecución: si el
+        planificador ya la ha tomado (RUNNING), la cancelación se rechaza.
 
+        Raises:
+            ScheduledTransferNotFoundError: Si no existe.
+            ValueError: Si ya no está en estado PENDING.
+        """
+        scheduled = self.get_scheduled_transfer(scheduled_id)
+        if not self.db.update_scheduled_transfer_status(
+            scheduled_id,
+            ScheduledTransferStatus.PENDING,
+            ScheduledTransferStatus.CANCELLED,
+        ):
+            raise ValueError(
+                f"Solo se pueden cancelar transferencias en estado PENDING "
+                f"(estado actual: {scheduled.status.value})."
+            )
+        self.scheduler.remove(scheduled_id)
+        return scheduled
+
+    def rebuild_transfer_schedule(self) -> int:
+        """
+        Reconstruye el planificador a partir de las transferencias PENDING
+        guardadas (p. ej. al arrancar la aplicación).
+
+        Returns:
+            El número de transferencias programadas.
+        """
+        pending = self.db.get_scheduled_transfers(
+            status=ScheduledTransferStatus.PENDING
+        )
+        self.scheduler.rebuild(pending)
+        return len(pending)
+
+    def execute_due_transfers(
+        self, now: float | None = None, limit: int | None = None
+    ) -> int:
+        """
+        Ejecuta, como un lote, las transferencias programadas que han vencido.
+
+        Args:
+            now: Marca de tiempo (epoch) de referencia; por defecto, la actual.
+            limit: Máximo de transferencias del lote. Las vencidas que no
+                caben se quedan en cola para el siguiente lote.
+
+        Returns:
+            El número de transferencias ejecutadas (con éxito o no).
+        """
+        due = self.scheduler.pop_due(now, limit)
+        for scheduled_id in due:
+            self._execute_scheduled_transfer(scheduled_id, now)
+        return len(due)
+
+    def _execute_scheduled_transfer(self, scheduled_id: UUID, now: float | None):
+        # Se reclama pasándola a RUNNING: desde aquí ya no puede cancelarse.
+        if not self.db.update_scheduled_transfer_status(
+            scheduled_id,
+            ScheduledTransferStatus.PENDING,
+            ScheduledTransferStatus.RUNNING,
+        ):
+            return  # Cancelada mientras estaba en el lote.
+        scheduled = self.db.get_scheduled_transfer_by_id(scheduled_id)
+
+        try:
+            transaction = self.create_transaction(
+                source_account_id=scheduled.source_account_id,
+                destination_account_id=scheduled.destination_account_id,
+                amount=scheduled.amount,
+            )
+            scheduled.last_transaction_id = transaction.id
+            scheduled.last_error = None
+            succeeded = True
         except Exception as e:
-            # Si algo falla durante la operación, marcamos la transacción como fallida.
-            transaction.status = TransactionStatus.FAILED
-            self.db.save_transaction(transaction)
-            print(f"Error durante la transacción {transaction.id}: {e}")
-            # Re-lanzamos la excepción para que la capa superior la maneje.
-            raise
+            # Un fallo no debe detener el resto del lote: se registra y se sigue.
+            scheduled.last_error = str(e)
+            succeeded = False
+
+        if scheduled.interval_seconds:
+            # Recurrente: se programa la siguiente ejecución futura, sin
+            # intentar recuperar las que se hayan perdido durante una parada.
+            reference = datetime.fromtimestamp(
+                now if now is not None else datetime.now(timezone.utc).timestamp(),
+                timezone.utc,
+            )
+            elapsed = (reference - scheduled.execute_at).total_seconds()
+            periods = max(1, math.floor(elapsed / scheduled.interval_seconds) + 1)
+            scheduled.execute_at += timedelta(
+                seconds=periods * scheduled.interval_seconds
+            )
+            # Vuelve a PENDING antes de entrar en el planificador: si vence de
+            # inmediato, el siguiente lote tiene que poder reclamarla.
+            scheduled.status = ScheduledTransferStatus.PENDING
+            self.db.save_scheduled_transfer(scheduled)
+            self.scheduler.add(scheduled)
+        else:
+            scheduled.status = (
+                ScheduledTransferStatus.COMPLETED
+                if succeeded
+                else ScheduledTransferStatus.FAILED
+            )
+            self.db.save_scheduled_transfer(scheduled)
@@ -0,0 +1,102 @@
+# services/transfer_scheduler.py
+
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+from core.config import settings
+from db.models import ScheduledTransfer
+from services.timer_wheel import TimerWheel
+
+
+class TransferScheduler:
+    """
+    Planificador en memoria de las transferencias programadas.
+
+    Solo guarda en una TimerWheel el ID y la fecha de cada transferencia
+    PENDING; la fuente de verdad son las transferencias guardadas en la base de
+    datos, así que tras un reinicio basta con llamar a rebuild() para
+    reconstruir la rueda a partir de ellas.
+
+    Las transferencias vencidas que no caben en un lote (ver pop_due) esperan
+    en una cola, por orden de vencimiento, hasta el siguiente. Quitar una
+    transferencia de la cola cuesta O(1): solo se olvida su entrada en
+    _queued, y pop_due descarta al sacarlas las entradas que ya no están ahí.
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._clock = clock
+        self._tick_seconds = tick_seconds
+        self._wheel = TimerWheel(tick_seconds=tick_seconds, start=clock())
+        self._due: Deque[Tuple[UUID, int]] = deque()
+        # ID -> ficha de su entrada vigente en _due.
+        self._queued: Dict[UUID, int] = {}
+        self._tokens = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._wheel) + len(self._queued)
+
+    def now(self) -> float:
+        """Marca de tiempo (epoch) actual según el reloj del planificador."""
+        return self._clock()
+
+    def add(self, scheduled: ScheduledTransfer):
+        """Programa (o reprograma) una transferencia en su fecha de ejecución."""
+        with self._lock:
+            # Si estaba vencida en la cola, esa entrada deja de valer.
+            self._queued.pop(scheduled.id, None)
+            self._wheel.schedule(
+                scheduled.id, scheduled.execute_at.timestamp(), scheduled.id
+            )
+
+    def remove(self, scheduled_id: UUID) -> bool:
+        """Quita una transferencia del planificador. Devuelve False si no estaba."""
+        with self._lock:
+            if self._queued.pop(scheduled_id, None) is not None:
+                return True
+            return self._wheel.cancel(scheduled_id)
+
+    def rebuild(self, pending: Iterable[ScheduledTransfer]):
+        """Vacía la rueda y la vuelve a llenar con las transferencias indicadas."""
+        with self._lock:
+            self._wheel = TimerWheel(
+                tick_seconds=self._tick_seconds, start=self._clock()
+            )
+            self._due.clear()
+            self._queued.clear()
+            for scheduled in pending:
+                self._wheel.schedule(
+                    scheduled.id, scheduled.execute_at.timestamp(), scheduled.id
+                )
+
+    def pop_due(self, now: float | None = None, limit: int | None = None) -> List[UUID]:
+        """
+        Devuelve (y quita del planificador) los IDs de las transferencias
+        vencidas, como mucho `limit`; las demás quedan para la siguiente llamada.
+        """
+        with self._lock:
+            for scheduled_id in self._wheel.advance(
+                self._clock() if now is None else now
+            ):
+                token = next(self._tokens)
+                self._queued[scheduled_id] = token
+                self._due.append((scheduled_id, token))
+            due: List[UUID] = []
+            while self._due and (limit is None or len(due) < limit):
+                scheduled_id, token = self._due.popleft()
+                if self._queued.get(scheduled_id) == token:
+                    del self._queued[scheduled_id]
+                    due.append(scheduled_id)
+            return due
+
+
+# Instancia única del planificador compartida por toda la aplicación.
+transfer_scheduler = TransferScheduler(tick_seconds=settings.SCHEDULER_TICK_SECONDS)
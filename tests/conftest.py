@@ -4,7 +4,35 @@ import pytest
 from fastapi.testclient import TestClient
 from typing import Generator
 
+from db import database
 from main import app
+from services.risk_engine import risk_engine
+from services.transfer_scheduler import transfer_scheduler
+
+
+@pytest.fixture(autouse=True)
+def clean_storage() -> Generator:
+    """
+    Vacía la base de datos en memoria antes de cada prueba, para que el
+    resultado no dependa del orden de ejecución. Los datos de ejemplo se
+    vuelven a crear en la primera petición a la API.
+    """
+    database._reset_storage()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clean_risk_engine() -> Generator:
+    """Olvida los contadores de velocidad del motor de reglas compartido."""
+    risk_engine.reset()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def clean_transfer_scheduler() -> Generator:
+    """Vacía el planificador compartido de transferencias programadas."""
+    transfer_scheduler.rebuild([])
+    yield
 
 
 @pytest.fixture(scope="module")
@@ -1,10 +1,14 @@
 # tests/integration/test_api_routes.py
 
+import asyncio
+import threading
 from fastapi.testclient import TestClient
 from decimal import Decimal
 
 # La fixture 'client' viene de conftest.py
 from core.config import settings
+from db.database import DatabaseSession
+from main import app
 
 
 def test_get_all_accounts_success(client: TestClient):
@@ -100,3 +104,234 @@ def test_create_transaction_api_success(client: TestClient):
     assert source_balance_after == source_balance_before - Decimal(
         str(amount_to_transfer)
     )
+
+
+def test_create_transaction_waiting_for_snapshot_does_not_block_other_requests(
+    client: TestClient,
+):
+    """Prueba que una transferencia que espera a una conciliación no bloquea la API."""
+    # Arrange
+    accounts = client.get("/api/v1/accounts").json()
+    payload = {
+        "source_account_id": accounts[0]["id"],
+        "destination_account_id": accounts[1]["id"],
+        "amount": 1.0,
+    }
+    headers = {"X-API-Key": settings.ADMIN_API_KEY.get_secret_value()}
+    responses = {}
+
+    def post_transaction():
+        responses["post"] = client.post(
+            "/api/v1/transactions", json=payload, headers=headers
+        )
+
+    def get_accounts():
+        responses["get"] = client.get("/api/v1/accounts")
+
+    poster = threading.Thread(target=post_transaction)
+    reader = threading.Thread(target=get_accounts)
+
+    # Act: con la foto del libro mayor tomada, la transferencia tiene que esperar.
+    with DatabaseSession().ledger_snapshot():
+        poster.start()
+        poster.join(timeout=0.2)
+        reader.start()
+        reader.join(timeout=5)
+        post_finished_during_snapshot = "post" in responses
+    poster.join(timeout=5)
+
+    # Assert
+    assert responses["get"].status_code == 200
+    assert not post_finished_during_snapshot
+    assert responses["post"].status_code == 201
+
+
+def test_stream_account_events_unknown_account(client: TestClient):
+    """Prueba que el stream de eventos devuelve 404 para una cuenta inexistente."""
+    # Act
+    response = client.get(
+        "/api/v1/accounts/3fa85f64-5717-4562-b3fc-2c963f66afa6/events"
+    )
+
+    # Assert
+    assert response.status_code == 404
+
+
+def test_stream_account_events_delivers_published_transaction(client: TestClient):
+    """
+    Prueba que un frame publicado llega al cliente a través del endpoint SSE.
+
+    El TestClient acumula la respuesta completa antes de devolverla, así que el
+    stream se consume llamando directamente a la aplicación ASGI. La transferencia
+    se crea desde otro hilo mientras el stream espera, como en producción.
+    """
+    # Arrange
+    accounts = client.get("/api/v1/accounts").json()
+    source_account, dest_account = accounts[0], accounts[1]
+    payload = {
+        "source_account_id": source_account["id"],
+        "destination_account_id": dest_account["id"],
+        "amount": 1.00,
+    }
+    headers = {"X-API-Key": settings.ADMIN_API_KEY.get_secret_value()}
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": f"/api/v1/accounts/{dest_account['id']}/events",
+        "raw_path": f"/api/v1/accounts/{dest_account['id']}/events".encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver")],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        disconnected = asyncio.Event()
+        request_sent = False
+        chunks = []
+        posted = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                # Ya hay suscripción: se transfiere desde un hilo del executor.
+                posted.append(
+                    loop.run_in_executor(
+                        None,
+                        lambda: client.post(
+                            "/api/v1/transactions", json=payload, headers=headers
+                        ),
+                    )
+                )
+            elif message.get("body"):
+                chunks.append(message["body"])
+                if b"event: transaction" in message["body"]:
+                    disconnected.set()
+
+        await asyncio.wait_for(app(scope, receive, send), timeout=5)
+        return chunks, await posted[0]
+
+    # Act
+    chunks, post_response = asyncio.run(scenario())
+
+    # Assert
+    assert post_response.status_code == 201
+    transaction_id = post_response.json()["id"]
+    stream = b"".join(chunks)
+    assert f"id: {transaction_id}".encode() in stream
+    assert b"event: transaction" in stream
+
+
+def test_search_accounts_by_name_prefix(client: TestClient):
+    """Prueba la búsqueda de cuentas por prefijo del nombre del titular."""
+    # Act
+    response = client.get("/api/v1/accounts/search", params={"name_prefix": "martín"})
+
+    # Assert
+    assert response.status_code == 200
+    names = [account["owner_name"] for account in response.json()]
+    assert "Martin Vargas" in names
+    assert "Kevin Rosero" not in names
+
+
+def test_search_accounts_invalid_balance_range(client: TestClient):
+    """Prueba que un rango de saldo invertido devuelve 400."""
+    # Act
+    response = client.get(
+        "/api/v1/accounts/search", params={"min_balance": 100, "max_balance": 10}
+    )
+
+    # Assert
+    assert response.status_code == 400
+
+
+def test_reconciliation_requires_api_key(client: TestClient):
+    """Prueba que la conciliación es un endpoint protegido."""
+    # Act
+    response = client.post(
+        "/api/v1/admin/reconciliation", headers={"X-API-Key": "clave-invalida"}
+    )
+
+    # Assert
+    assert response.status_code == 401
+
+
+def test_reconciliation_success(client: TestClient):
+    """Prueba que la conciliación no encuentra discrepancias tras las transacciones."""
+    # Arrange
+    headers = {"X-API-Key": settings.ADMIN_API_KEY.get_secret_value()}
+
+    # Act
+    response = client.post(
+        "/api/v1/admin/reconciliation", params={"full": True}, headers=headers
+    )
+
+    # Assert
+    assert response.status_code == 200
+    report = response.json()
+    assert report["mismatches"] == []
+    assert report["money_conserved"] is True
+
+
+def test_scheduled_transfer_create_list_and_cancel(client: TestClient):
+    """Prueba el ciclo de vida de una transferencia programada a través de la API."""
+    # Arrange
+    accounts = client.get("/api/v1/accounts").json()
+    headers = {"X-API-Key": settings.ADMIN_API_KEY.get_secret_value()}
+    payload = {
+        "source_account_id": accounts[0]["id"],
+        "destination_account_id": accounts[1]["id"],
+        "amount": 15.0,
+        "execute_at": "2100-01-01T00:00:00Z",
+        "interval_seconds": 86400,
+    }
+
+    # Act
+    created = client.post("/api/v1/scheduled-transfers", json=payload, headers=headers)
+    scheduled_id = created.json()["id"]
+    listed = client.get(
+        "/api/v1/scheduled-transfers",
+        params={"account_id": accounts[0]["id"], "status": "PENDING"},
+    )
+    cancelled = client.delete(
+        f"/api/v1/scheduled-transfers/{scheduled_id}", headers=headers
+    )
+
+    # Assert
+    assert created.status_code == 201
+    assert created.json()["status"] == "PENDING"
+    assert scheduled_id in [item["id"] for item in listed.json()]
+    assert cancelled.status_code == 200
+    assert cancelled.json()["status"] == "CANCELLED"
+
+
+def test_scheduled_transfer_in_the_past_is_rejected(client: TestClient):
+    """Prueba que no se puede programar una transferencia en una fecha pasada."""
+    # Arrange
+    accounts = client.get("/api/v1/accounts").json()
+    headers = {"X-API-Key": settings.ADMIN_API_KEY.get_secret_value()}
+    payload = {
+        "source_account_id": accounts[0]["id"],
+        "destination_account_id": accounts[1]["id"],
+        "amount": 15.0,
+        "execute_at": "2000-01-01T00:00:00Z",
+    }
+
+    # Act
+    response = client.post("/api/v1/scheduled-transfers", json=payload, headers=headers)
+
+    # Assert
+    assert response.status_code == 400
+    assert "futuro" in response.json()["detail"]
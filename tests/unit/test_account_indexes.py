@@ -0,0 +1,152 @@
+# tests/unit/test_account_indexes.py
+
+import random
+from uuid import uuid4
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+
+from db.database import DatabaseSession
+from db.indexes import SortedKeyIndex, normalize_owner_name
+from db.models import Account
+from services.risk_engine import RiskEngine
+from services.transaction_service import TransactionService
+
+
+def test_normalize_owner_name():
+    """Prueba que la normalización ignora tildes, mayúsculas y espacios extra."""
+    assert normalize_owner_name("  Martín   VARGAS ") == "martin vargas"
+    assert normalize_owner_name("Núñez") == "nunez"
+
+
+def test_sorted_key_index_matches_sorted_list():
+    """Prueba el índice contra una lista ordenada de referencia."""
+    # Arrange: bloques pequeños para forzar divisiones y borrados de bloques.
+    rng = random.Random(42)
+    index = SortedKeyIndex(load=4)
+    reference = set()
+
+    # Act
+    for _ in range(500):
+        key = rng.randrange(1000)
+        if key in reference:
+            index.remove(key)
+            reference.discard(key)
+        else:
+            index.add(key)
+            reference.add(key)
+
+    # Assert
+    expected = sorted(reference)
+    assert len(index) == len(expected)
+    assert list(index.irange()) == expected
+    assert list(index.irange(100, 300)) == [k for k in expected if 100 <= k <= 300]
+    assert index.count(100, 300) == len([k for k in expected if 100 <= k <= 300])
+    assert (
+        list(index.irange(100, 300, skip=5))
+        == [k for k in expected if 100 <= k <= 300][5:]
+    )
+
+
+def test_search_accounts_combines_filters():
+    """Prueba la búsqueda por prefijo de nombre, saldo y fecha de creación."""
+    # Arrange: un apellido único aísla la prueba de otros datos en memoria.
+    db = DatabaseSession()
+    surname = f"Zz{uuid4().hex[:8]}"
+    now = datetime.now(timezone.utc)
+    poor = Account(owner_name=f"Ána {surname}", balance=Decimal("10.00"))
+    rich = Account(owner_name=f"ana {surname}", balance=Decimal("900.00"))
+    old = Account(
+        owner_name=f"Ana {surname}",
+        balance=Decimal("500.00"),
+        created_at=now - timedelta(days=30),
+    )
+    for account in (poor, rich, old):
+        db.save_account(account)
+    prefix = f"ANA {surname}"
+
+    # Act
+    by_name = db.search_accounts(name_prefix=prefix)
+    by_balance = db.search_accounts(name_prefix=prefix, min_balance=Decimal("100"))
+    by_date = db.search_accounts(
+        name_prefix=prefix,
+        min_balance=Decimal("100"),
+        created_from=now - timedelta(days=1),
+    )
+
+    # Assert
+    assert {a.id for a in by_name} == {poor.id, rich.id, old.id}
+    assert {a.id for a in by_balance} == {rich.id, old.id}
+    assert [a.id for a in by_date] == [rich.id]
+
+
+def test_search_accounts_reflects_balance_updates_and_pagination():
+    """Prueba que el índice de saldos se actualiza en save_account y la paginación."""
+    # Arrange
+    db = DatabaseSession()
+    surname = f"Zz{uuid4().hex[:8]}"
+    accounts = [
+        Account(owner_name=f"{surname} {i}", balance=Decimal("1.00")) for i in range(5)
+    ]
+    for account in accounts:
+        db.save_account(account)
+
+    # Act: una transferencia real cambia el saldo de dos cuentas.
+    service = TransactionService(db, risk_engine=RiskEngine([]))
+    service.create_transaction(accounts[4].id, accounts[0].id, Decimal("1.00"))
+    page = db.search_accounts(name_prefix=surname, offset=1, limit=2)
+    updated = db.search_accounts(
+        name_prefix=surname, min_balance=Decimal("2.00"), max_balance=Decimal("2.00")
+    )
+
+    # Assert
+    assert [a.id for a in page] == [accounts[1].id, accounts[2].id]
+    assert [a.id for a in updated] == [accounts[0].id]
+
+
+def test_search_accounts_order_is_fixed_per_filter_combination():
+    """
+    Prueba que con varios filtros el orden depende solo de los filtros usados,
+    sea cual sea el índice más selectivo, y que las páginas no se solapan.
+    """
+    # Arrange
+    rng = random.Random(3)
+    db = DatabaseSession()
+    accounts = [
+        Account(
+            owner_name=f"{rng.choice(['Ana', 'Luis'])} {i:03d}",
+            balance=Decimal(rng.randrange(0, 1000)),
+        )
+        for i in range(400)
+    ]
+    for account in accounts:
+        db.save_account(account)
+
+    def expected(min_balance, max_balance):
+        found = [
+            a
+            for a in accounts
+            if a.owner_name.startswith("Ana")
+            and min_balance <= a.balance <= max_balance
+        ]
+        found.sort(key=lambda a: (normalize_owner_name(a.owner_name), a.id))
+        return [a.id for a in found]
+
+    # Act & Assert: un rango estrecho (se recorre el índice de saldos y se
+    # ordena) y uno amplio (se recorre el índice de nombres) dan el mismo orden.
+    for min_balance, max_balance in (
+        (Decimal(10), Decimal(14)),
+        (Decimal(0), Decimal(999)),
+    ):
+        pages = []
+        for offset in range(0, 400, 7):
+            pages.extend(
+                a.id
+                for a in db.search_accounts(
+                    name_prefix="ana",
+                    min_balance=min_balance,
+                    max_balance=max_balance,
+                    offset=offset,
+                    limit=7,
+                )
+            )
+        assert pages == expected(min_balance, max_balance)
@@ -0,0 +1,98 @@
+# tests/unit/test_balance_sharding.py
+
+import pytest
+import threading
+from decimal import Decimal
+
+from db.database import DatabaseSession
+from db.sharding import ShardedBalance
+from db.models import TransactionStatus
+from services.transaction_service import TransactionService
+from core.exceptions import InsufficientFundsError
+
+
+def test_sharded_balance_credits_and_debits_across_slots():
+    """Prueba que los cargos se validan y descuentan sobre el saldo agregado."""
+    # Arrange
+    balance = ShardedBalance(Decimal("10.00"), slots=4)
+    for _ in range(4):
+        balance.credit(Decimal("5.00"))
+
+    # Act
+    debited = balance.try_debit(Decimal("27.00"))
+    rejected = balance.try_debit(Decimal("4.00"))
+
+    # Assert
+    assert debited
+    assert not rejected
+    assert balance.total() == Decimal("3.00")
+
+
+def test_sharded_balance_concurrent_credits_are_not_lost():
+    """Prueba que los abonos concurrentes de varios hilos no se pierden."""
+    # Arrange
+    balance = ShardedBalance(Decimal("0.00"), slots=8)
+
+    def writer():
+        for _ in range(1000):
+            balance.credit(Decimal("0.01"))
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+
+    # Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert balance.total() == Decimal("80.00")
+
+
+def test_transfers_to_and_from_sharded_account():
+    """Prueba el flujo completo de transferencias con una cuenta fragmentada."""
+    # Arrange
+    db = DatabaseSession()
+    service = TransactionService(db)
+    customer = service.create_account("Cliente", Decimal("100.00"))
+    merchant = service.create_account("Comercio", Decimal("0.00"))
+    service.enable_balance_sharding(merchant.id, slots=4)
+
+    # Act
+    for _ in range(5):
+        service.create_transaction(customer.id, merchant.id, Decimal("10.00"))
+    refund = service.create_transaction(merchant.id, customer.id, Decimal("35.00"))
+
+    # Assert
+    assert refund.status == TransactionStatus.COMPLETED
+    assert service.get_account(merchant.id).balance == Decimal("15.00")
+    assert service.get_account(customer.id).balance == Decimal("85.00")
+    found = db.search_accounts(
+        name_prefix="Comercio",
+        min_balance=Decimal("15.00"),
+        max_balance=Decimal("15.00"),
+    )
+    assert merchant.id in {account.id for account in found}
+
+
+def test_debit_from_sharded_account_checks_aggregate_balance():
+    """Prueba que no se puede cargar más que el saldo agregado."""
+    # Arrange
+    service = TransactionService(DatabaseSession())
+    merchant = service.create_account("Comercio", Decimal("20.00"))
+    customer = service.create_account("Cliente", Decimal("0.00"))
+    service.enable_balance_sharding(merchant.id, slots=2)
+
+    # Act & Assert
+    with pytest.raises(InsufficientFundsError):
+        service.create_transaction(merchant.id, customer.id, Decimal("20.01"))
+    assert service.get_account(merchant.id).balance == Decimal("20.00")
+
+
+def test_enable_balance_sharding_rejects_invalid_slots():
+    """Prueba que el número de slots debe estar en un rango válido."""
+    service = TransactionService(DatabaseSession())
+    account = service.create_account("Comercio", Decimal("1.00"))
+
+    with pytest.raises(ValueError):
+        service.enable_balance_sharding(account.id, slots=1)
@@ -0,0 +1,142 @@
+# tests/unit/test_event_hub.py
+
+import asyncio
+import threading
+from uuid import uuid4
+from decimal import Decimal
+
+from services.event_hub import TransactionEventHub
+from services.transaction_service import TransactionService
+from db.models import Account, Transaction, TransactionStatus
+from tests.unit.test_transaction_service import MockDatabaseSession
+
+
+def _make_transaction(source_id, destination_id) -> Transaction:
+    return Transaction(
+        source_account_id=source_id,
+        destination_account_id=destination_id,
+        amount=Decimal("10.00"),
+        status=TransactionStatus.COMPLETED,
+    )
+
+
+def test_publish_delivers_to_source_and_destination_subscribers():
+    """Prueba que el evento llega a los suscriptores de ambas cuentas."""
+    # Arrange
+    hub = TransactionEventHub()
+    source_id, destination_id = uuid4(), uuid4()
+    source_sub = hub.subscribe([source_id])
+    destination_sub = hub.subscribe([destination_id])
+    unrelated_sub = hub.subscribe([uuid4()])
+
+    # Act
+    delivered = hub.publish(_make_transaction(source_id, destination_id))
+
+    # Assert
+    assert delivered == 2
+    assert source_sub.pending() == 1
+    assert destination_sub.pending() == 1
+    assert unrelated_sub.pending() == 0
+
+
+def test_publish_serializes_once_and_deduplicates_subscribers():
+    """Prueba que todos reciben el mismo frame y que no hay duplicados."""
+    # Arrange
+    hub = TransactionEventHub()
+    source_id, destination_id = uuid4(), uuid4()
+    both_sub = hub.subscribe([source_id, destination_id])
+    other_sub = hub.subscribe([destination_id])
+    transaction = _make_transaction(source_id, destination_id)
+
+    # Act
+    hub.publish(transaction)
+
+    # Assert
+    both_frames = both_sub.drain()
+    other_frames = other_sub.drain()
+    assert len(both_frames) == 1
+    assert both_frames[0] is other_frames[0]
+    assert str(transaction.id).encode() in both_frames[0]
+
+
+def test_slow_consumer_is_disconnected_when_buffer_is_full():
+    """Prueba la política de desconexión de consumidores lentos."""
+    # Arrange
+    hub = TransactionEventHub(max_buffer=2)
+    source_id, destination_id = uuid4(), uuid4()
+    subscription = hub.subscribe([source_id])
+
+    # Act
+    for _ in range(3):
+        hub.publish(_make_transaction(source_id, destination_id))
+
+    # Assert
+    assert subscription.closed
+    assert subscription.overflowed
+    assert hub.subscriber_count() == 0
+    assert len(subscription.drain()) == 2
+
+
+def test_next_batch_waits_for_published_events():
+    """Prueba que un consumidor en espera se despierta al publicarse un evento."""
+
+    async def scenario():
+        hub = TransactionEventHub()
+        account_id = uuid4()
+        subscription = hub.subscribe([account_id])
+        waiter = asyncio.create_task(subscription.next_batch(timeout=1))
+        await asyncio.sleep(0)
+        hub.publish(_make_transaction(account_id, uuid4()))
+        return await waiter
+
+    frames = asyncio.run(scenario())
+
+    assert len(frames) == 1
+
+
+def test_publish_from_another_thread_wakes_consumer():
+    """Prueba que publicar desde un hilo distinto al del loop despierta al consumidor."""
+
+    async def scenario():
+        hub = TransactionEventHub()
+        account_id = uuid4()
+        subscription = hub.subscribe([account_id])
+        waiter = asyncio.create_task(subscription.next_batch(timeout=2))
+        await asyncio.sleep(0)
+        publisher = threading.Thread(
+            target=hub.publish, args=(_make_transaction(account_id, uuid4()),)
+        )
+        publisher.start()
+        frames = await waiter
+        publisher.join()
+        return frames
+
+    frames = asyncio.run(scenario())
+
+    assert len(frames) == 1
+
+
+def test_create_transaction_publishes_completed_transaction():
+    """Prueba que el servicio publica la transacción completada en el hub."""
+    # Arrange
+    mock_db = MockDatabaseSession()
+    source_account = Account(owner_name="Sender", balance=Decimal("100.00"))
+    dest_account = Account(owner_name="Receiver", balance=Decimal("50.00"))
+    mock_db.save_account(source_account)
+    mock_db.save_account(dest_account)
+    hub = TransactionEventHub()
+    subscription = hub.subscribe([dest_account.id])
+    service = TransactionService(db_session=mock_db, event_hub=hub)
+
+    # Act
+    transaction = service.create_transaction(
+        source_account_id=source_account.id,
+        destination_account_id=dest_account.id,
+        amount=Decimal("5.00"),
+    )
+
+    # Assert
+    frames = subscription.drain()
+    assert len(frames) == 1
+    assert str(transaction.id).encode() in frames[0]
+    assert b'"status":"COMPLETED"' in frames[0]
@@ -0,0 +1,131 @@
+# tests/unit/test_reconciliation_service.py
+
+import threading
+from decimal import Decimal
+
+from db.database import RECONCILIATION_PARTITIONS, DatabaseSession, partition_of
+from services import reconciliation_service
+from services.reconciliation_service import ReconciliationService, create_worker_pool
+from services.risk_engine import RiskEngine
+from services.transaction_service import TransactionService
+
+
+def _make_transfers(db: DatabaseSession):
+    service = TransactionService(db, risk_engine=RiskEngine([]))
+    alice = service.create_account("Alice", Decimal("100.00"))
+    bob = service.create_account("Bob", Decimal("20.00"))
+    service.create_transaction(alice.id, bob.id, Decimal("30.00"))
+    service.create_transaction(bob.id, alice.id, Decimal("5.50"))
+    return service, alice, bob
+
+
+def test_reconciliation_reports_consistent_ledger():
+    """Prueba que un libro mayor correcto no genera discrepancias."""
+    # Arrange
+    db = DatabaseSession()
+    _make_transfers(db)
+
+    # Act
+    report = ReconciliationService(db).reconcile(full=True)
+
+    # Assert
+    assert report.mismatches == []
+    assert report.money_conserved
+    assert report.skipped_partitions == 0
+
+
+def test_reconciliation_detects_tampered_balance():
+    """Prueba que se detecta una cuenta cuyo saldo no cuadra con sus movimientos."""
+    # Arrange
+    db = DatabaseSession()
+    _, alice, _ = _make_transfers(db)
+    stored = db.get_account_by_id(alice.id)
+    original = stored.balance
+
+    # Act
+    stored.balance = original + Decimal("1.00")
+    db.save_account(stored)
+    report = ReconciliationService(db).reconcile()
+    stored.balance = original
+    db.save_account(stored)
+
+    # Assert
+    assert [m.account_id for m in report.mismatches] == [alice.id]
+    assert report.mismatches[0].expected_balance == Decimal("75.50")
+    assert not report.money_conserved
+
+
+def test_reconciliation_only_rechecks_changed_partitions():
+    """Prueba que las ejecuciones incrementales solo leen las particiones con cambios."""
+    # Arrange
+    db = DatabaseSession()
+    service, alice, bob = _make_transfers(db)
+    for i in range(20):
+        service.create_account(f"Cuenta {i}", Decimal("10.00"))
+    reconciler = ReconciliationService(db)
+    reconciler.reconcile(full=True)
+
+    # Act
+    service.create_transaction(alice.id, bob.id, Decimal("1.00"))
+    report = reconciler.reconcile()
+
+    # Assert: solo se leen las cuentas de las particiones de Alice y Bob, y
+    # los únicos movimientos son los de sus tres transferencias.
+    touched = {partition_of(alice.id), partition_of(bob.id)}
+    in_touched = [a for a in db.get_all_accounts() if partition_of(a.id) in touched]
+    assert report.mismatches == []
+    assert report.money_conserved
+    assert report.total_balance == Decimal("320.00")
+    assert report.checked_partitions == len(touched)
+    assert report.skipped_partitions == RECONCILIATION_PARTITIONS - len(touched)
+    assert report.checked_accounts == len(in_touched)
+    assert report.movements_scanned == 6
+
+
+def test_reconciliation_snapshot_is_consistent_with_concurrent_transfers():
+    """Prueba que una transferencia a medias nunca aparece como discrepancia."""
+    # Arrange
+    db = DatabaseSession()
+    service, alice, bob = _make_transfers(db)
+    reconciler = ReconciliationService(db)
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            service.create_transaction(alice.id, bob.id, Decimal("0.01"))
+            service.create_transaction(bob.id, alice.id, Decimal("0.01"))
+
+    thread = threading.Thread(target=writer)
+
+    # Act
+    thread.start()
+    try:
+        reports = [reconciler.reconcile(full=True) for _ in range(200)]
+    finally:
+        stop.set()
+        thread.join()
+
+    # Assert
+    assert all(r.mismatches == [] and r.money_conserved for r in reports)
+
+
+def test_reconciliation_in_process_pool(monkeypatch):
+    """Prueba que el cálculo en el pool de procesos da el mismo resultado que en el proceso."""
+    # Arrange
+    db = DatabaseSession()
+    _, alice, _ = _make_transfers(db)
+    stored = db.get_account_by_id(alice.id)
+    stored.balance += Decimal("1.00")
+    db.save_account(stored)
+    monkeypatch.setattr(reconciliation_service, "PARALLEL_THRESHOLD", 0)
+
+    # Act
+    with create_worker_pool(2) as pool:
+        parallel = ReconciliationService(db, pool).reconcile(full=True)
+    sequential = ReconciliationService(db).reconcile(full=True)
+
+    # Assert
+    assert parallel.mismatches == sequential.mismatches
+    assert [m.account_id for m in parallel.mismatches] == [alice.id]
+    assert parallel.checked_accounts == sequential.checked_accounts == 2
+    assert not parallel.money_conserved
@@ -0,0 +1,195 @@
+# tests/unit/test_risk_engine.py
+
+import pytest
+import threading
+from uuid import uuid4
+from decimal import Decimal
+
+from core.config import VelocityRuleConfig
+from core.exceptions import TransferLimitExceededError
+from db.database import DatabaseSession
+from db.models import Account, TransactionStatus
+from services.risk_engine import RiskEngine, SlidingWindowCounter
+from services.transaction_service import TransactionService
+from tests.unit.test_transaction_service import MockDatabaseSession
+
+
+class FakeClock:
+    """Reloj controlable para simular el paso del tiempo."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _transfer(engine: RiskEngine, source, destination, amount: Decimal):
+    """Comprueba y registra una transferencia, como hace el servicio al completarla."""
+    with engine.guard_transfer(source, destination, amount):
+        pass
+
+
+def test_sliding_window_counter_expires_old_buckets():
+    """Prueba que los eventos salen de la ventana cuando caducan sus buckets."""
+    # Arrange
+    counter = SlidingWindowCounter(span_seconds=60, bucket_seconds=1)
+
+    # Act
+    counter.add(100.0, Decimal("5.00"))
+    counter.add(130.0, Decimal("7.00"))
+
+    # Assert
+    assert counter.totals(130.5) == (2, Decimal("12.00"))
+    assert counter.totals(165.0) == (1, Decimal("7.00"))
+    assert counter.totals(500.0) == (0, Decimal("0.00"))
+
+
+def test_max_count_per_window():
+    """Prueba el límite de número de transferencias por minuto."""
+    # Arrange
+    clock = FakeClock()
+    engine = RiskEngine(
+        [VelocityRuleConfig(name="min", window="minute", max_count=2)], clock=clock
+    )
+    source, destination = uuid4(), uuid4()
+
+    # Act & Assert
+    _transfer(engine, source, destination, Decimal("1.00"))
+    _transfer(engine, source, destination, Decimal("1.00"))
+    with pytest.raises(TransferLimitExceededError) as excinfo:
+        _transfer(engine, source, destination, Decimal("1.00"))
+    assert "'min'" in str(excinfo.value)
+
+    clock.now += 61
+    _transfer(engine, source, destination, Decimal("1.00"))
+
+
+def test_max_amount_and_new_destinations():
+    """Prueba los límites de monto acumulado y de destinatarios nuevos."""
+    # Arrange
+    clock = FakeClock()
+    engine = RiskEngine(
+        [
+            VelocityRuleConfig(
+                name="hora",
+                window="hour",
+                max_amount=Decimal("100.00"),
+                max_new_destinations=2,
+            )
+        ],
+        clock=clock,
+    )
+    source, first, second = uuid4(), uuid4(), uuid4()
+
+    # Act & Assert
+    _transfer(engine, source, first, Decimal("60.00"))
+    with pytest.raises(TransferLimitExceededError):
+        _transfer(engine, source, first, Decimal("40.01"))
+    _transfer(engine, source, second, Decimal("10.00"))
+    with pytest.raises(TransferLimitExceededError):
+        _transfer(engine, source, uuid4(), Decimal("1.00"))
+    # Un destinatario ya conocido no cuenta como nuevo.
+    _transfer(engine, source, first, Decimal("1.00"))
+
+
+def test_create_transaction_rejected_by_risk_engine():
+    """Prueba que una transferencia rechazada no mueve dinero."""
+    # Arrange
+    mock_db = MockDatabaseSession()
+    source_account = Account(owner_name="Sender", balance=Decimal("100.00"))
+    dest_account = Account(owner_name="Receiver", balance=Decimal("50.00"))
+    mock_db.save_account(source_account)
+    mock_db.save_account(dest_account)
+    engine = RiskEngine(
+        [VelocityRuleConfig(name="min", window="minute", max_amount=Decimal("20"))]
+    )
+    service = TransactionService(db_session=mock_db, risk_engine=engine)
+
+    # Act & Assert
+    with pytest.raises(TransferLimitExceededError):
+        service.create_transaction(
+            source_account_id=source_account.id,
+            destination_account_id=dest_account.id,
+            amount=Decimal("25.00"),
+        )
+    assert mock_db.accounts[source_account.id].balance == Decimal("100.00")
+    assert len(mock_db.transactions) == 0
+
+
+def test_failed_transfer_does_not_consume_limits():
+    """Prueba que una transferencia que falla al mover el dinero no cuenta para los límites."""
+    # Arrange
+    mock_db = MockDatabaseSession()
+    source_account = Account(owner_name="Sender", balance=Decimal("100.00"))
+    dest_account = Account(owner_name="Receiver", balance=Decimal("50.00"))
+    mock_db.save_account(source_account)
+    mock_db.save_account(dest_account)
+    engine = RiskEngine([VelocityRuleConfig(name="min", window="minute", max_count=1)])
+    service = TransactionService(db_session=mock_db, risk_engine=engine)
+
+    def failing_debit(account, amount):
+        raise RuntimeError("Fallo simulado al cargar la cuenta")
+
+    real_debit, service._debit = service._debit, failing_debit
+
+    # Act
+    with pytest.raises(RuntimeError):
+        service.create_transaction(source_account.id, dest_account.id, Decimal("5.00"))
+    service._debit = real_debit
+    transaction = service.create_transaction(
+        source_account.id, dest_account.id, Decimal("5.00")
+    )
+
+    # Assert: el límite de una transferencia por minuto sigue disponible.
+    assert transaction.status == TransactionStatus.COMPLETED
+    with pytest.raises(TransferLimitExceededError):
+        service.create_transaction(source_account.id, dest_account.id, Decimal("5.00"))
+
+
+def test_concurrent_transfers_from_sharded_source_respect_limits():
+    """Prueba que una cuenta fragmentada no supera el límite con transferencias concurrentes."""
+    # Arrange: la fila de una cuenta fragmentada no se bloquea, así que solo el
+    # motor de reglas puede impedir que ambas transferencias pasen la comprobación.
+    engine = RiskEngine([VelocityRuleConfig(name="min", window="minute", max_count=1)])
+    service = TransactionService(DatabaseSession(), risk_engine=engine)
+    merchant = service.create_account("Comercio", Decimal("100.00"))
+    first = service.create_account("Cliente 1", Decimal("0.00"))
+    second = service.create_account("Cliente 2", Decimal("0.00"))
+    service.enable_balance_sharding(merchant.id, slots=2)
+
+    moving, release = threading.Event(), threading.Event()
+    real_credit = service._credit
+
+    def slow_credit(account, amount):
+        # La primera transferencia se detiene a mitad del movimiento de dinero.
+        if account.id == first.id:
+            moving.set()
+            release.wait(timeout=5)
+        real_credit(account, amount)
+
+    service._credit = slow_credit
+    results = {}
+
+    def transfer(destination_id):
+        try:
+            service.create_transaction(merchant.id, destination_id, Decimal("10.00"))
+            results[destination_id] = "ok"
+        except TransferLimitExceededError:
+            results[destination_id] = "rechazada"
+
+    threads = [threading.Thread(target=transfer, args=(first.id,))]
+    threads[0].start()
+    assert moving.wait(timeout=5)
+
+    # Act: la segunda transferencia empieza mientras la primera mueve el dinero.
+    threads.append(threading.Thread(target=transfer, args=(second.id,)))
+    threads[1].start()
+    threads[1].join(timeout=0.1)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # Assert
+    assert results == {first.id: "ok", second.id: "rechazada"}
+    assert service.get_account(merchant.id).balance == Decimal("90.00")
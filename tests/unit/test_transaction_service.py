@@ -1,6 +1,7 @@
 # tests/unit/test_transaction_service.py
 
 import pytest
+from contextlib import nullcontext
 from uuid import uuid4
 from decimal import Decimal
 
@@ -28,6 +29,15 @@ class MockDatabaseSession:
     def save_transaction(self, transaction):
         self.transactions[transaction.id] = transaction
 
+    def lock_accounts(self, *account_ids):
+        return nullcontext()
+
+    def ledger_update(self):
+        return nullcontext()
+
+    def is_balance_sharded(self, account_id):
+        return False
+
 
 # --- Suite de Pruebas para TransactionService ---
 
@@ -0,0 +1,343 @@
+# tests/unit/test_transfer_scheduler.py
+
+import pytest
+import random
+from uuid import uuid4
+from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+
+from core.exceptions import ScheduledTransferNotFoundError
+from db.database import DatabaseSession
+from db.models import ScheduledTransferStatus
+from services.risk_engine import RiskEngine
+from services.timer_wheel import TimerWheel
+from services.transaction_service import TransactionService
+from services.transfer_scheduler import TransferScheduler
+
+START = datetime(2030, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def test_timer_wheel_fires_each_entry_on_its_tick():
+    """Prueba que cada entrada vence exactamente en su tick, incluso tras cascadas."""
+    # Arrange: niveles pequeños para forzar cascadas y desbordamiento.
+    wheel = TimerWheel(tick_seconds=1, start=0, levels=(4, 4, 4))
+    rng = random.Random(5)
+    deadlines = {key: rng.randrange(1, 500) for key in range(300)}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline, key)
+
+    # Act
+    fired_at = {}
+    for now in range(1, 501):
+        for key in wheel.advance(now):
+            fired_at[key] = now
+
+    # Assert
+    assert fired_at == deadlines
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_cancel_and_past_deadlines():
+    """Prueba la cancelación y que las fechas pasadas vencen en el siguiente tick."""
+    # Arrange
+    wheel = TimerWheel(tick_seconds=1, start=100)
+    wheel.schedule("cancelada", 150)
+    wheel.schedule("pasada", 50, "pasada")
+
+    # Act
+    cancelled = wheel.cancel("cancelada")
+    due = wheel.advance(101)
+
+    # Assert
+    assert cancelled
+    assert not wheel.cancel("cancelada")
+    assert due == ["pasada"]
+    assert wheel.advance(200) == []
+
+
+def test_timer_wheel_never_fires_before_a_fractional_deadline():
+    """Prueba que una fecha entre dos ticks vence en el tick siguiente, no antes."""
+    # Arrange
+    wheel = TimerWheel(tick_seconds=1, start=0)
+    wheel.schedule("fraccionaria", 10.9, "fraccionaria")
+    wheel.schedule("exacta", 12, "exacta")
+
+    # Act & Assert
+    assert wheel.advance(10.95) == []
+    assert wheel.advance(11) == ["fraccionaria"]
+    assert wheel.advance(11.99) == []
+    assert wheel.advance(12) == ["exacta"]
+
+
+def _make_service():
+    scheduler = TransferScheduler(clock=lambda: START)
+    service = TransactionService(
+        DatabaseSession(), risk_engine=RiskEngine([]), scheduler=scheduler
+    )
+    source = service.create_account("Pagador", Decimal("100.00"))
+    destination = service.create_account("Beneficiario", Decimal("0.00"))
+    return service, source, destination
+
+
+def test_scheduled_transfer_executes_when_due():
+    """Prueba que una transferencia programada se ejecuta al vencer."""
+    # Arrange
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START + 60, timezone.utc)
+    scheduled = service.schedule_transfer(
+        source.id, destination.id, Decimal("25.00"), execute_at
+    )
+
+    # Act
+    early = service.execute_due_transfers(now=START + 59)
+    on_time = service.execute_due_transfers(now=START + 60)
+
+    # Assert
+    assert early == 0
+    assert on_time == 1
+    assert scheduled.status == ScheduledTransferStatus.COMPLETED
+    assert scheduled.last_transaction_id is not None
+    assert service.get_account(destination.id).balance == Decimal("25.00")
+
+
+def test_scheduled_transfer_with_fractional_date_does_not_run_early():
+    """Prueba que una fecha con fracciones de segundo no se ejecuta antes de tiempo."""
+    # Arrange
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START + 10.9, timezone.utc)
+    scheduled = service.schedule_transfer(
+        source.id, destination.id, Decimal("1.00"), execute_at
+    )
+
+    # Act
+    fired = [
+        service.execute_due_transfers(now=START + offset)
+        for offset in (10.05, 10.95, 11)
+    ]
+
+    # Assert
+    assert fired == [0, 0, 1]
+    assert scheduled.status == ScheduledTransferStatus.COMPLETED
+
+
+def test_recurring_transfer_is_rescheduled_and_can_be_cancelled():
+    """Prueba las transferencias recurrentes y su cancelación."""
+    # Arrange
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START + 10, timezone.utc)
+    scheduled = service.schedule_transfer(
+        source.id, destination.id, Decimal("10.00"), execute_at, interval_seconds=60
+    )
+
+    # Act
+    service.execute_due_transfers(now=START + 10)
+    service.execute_due_transfers(now=START + 70)
+    service.cancel_scheduled_transfer(scheduled.id)
+    fired_after_cancel = service.execute_due_transfers(now=START + 130)
+
+    # Assert
+    assert fired_after_cancel == 0
+    assert scheduled.status == ScheduledTransferStatus.CANCELLED
+    assert scheduled.execute_at == execute_at + timedelta(seconds=120)
+    assert service.get_account(destination.id).balance == Decimal("20.00")
+    with pytest.raises(ValueError):
+        service.cancel_scheduled_transfer(scheduled.id)
+
+
+def test_cancel_is_rejected_once_execution_has_started():
+    """Prueba que no se puede cancelar una transferencia que ya se está ejecutando."""
+    # Arrange
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START + 10, timezone.utc)
+    one_off = service.schedule_transfer(
+        source.id, destination.id, Decimal("10.00"), execute_at
+    )
+    recurring = service.schedule_transfer(
+        source.id, destination.id, Decimal("5.00"), execute_at, interval_seconds=60
+    )
+    real_create_transaction = service.create_transaction
+    cancel_errors = []
+
+    def create_transaction_with_cancel(**kwargs):
+        # Simula un DELETE que llega mientras el lote mueve el dinero.
+        running = one_off if kwargs["amount"] == one_off.amount else recurring
+        try:
+            service.cancel_scheduled_transfer(running.id)
+        except ValueError as e:
+            cancel_errors.append(str(e))
+        return real_create_transaction(**kwargs)
+
+    service.create_transaction = create_transaction_with_cancel
+
+    # Act
+    service.execute_due_transfers(now=START + 10)
+
+    # Assert: ambas cancelaciones se rechazan y la ejecución sigue su curso.
+    assert len(cancel_errors) == 2
+    assert all("RUNNING" in error for error in cancel_errors)
+    assert one_off.status == ScheduledTransferStatus.COMPLETED
+    assert recurring.status == ScheduledTransferStatus.PENDING
+    assert len(service.scheduler) == 1
+    assert service.get_account(destination.id).balance == Decimal("15.00")
+
+
+def test_failed_scheduled_transfer_records_error():
+    """Prueba que un fallo en la ejecución queda registrado en la transferencia."""
+    # Arrange
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START + 5, timezone.utc)
+    scheduled = service.schedule_transfer(
+        source.id, destination.id, Decimal("500.00"), execute_at
+    )
+
+    # Act
+    service.execute_due_transfers(now=START + 5)
+
+    # Assert
+    assert scheduled.status == ScheduledTransferStatus.FAILED
+    assert "Saldo insuficiente" in scheduled.last_error
+
+
+def test_rebuild_restores_pending_transfers():
+    """Prueba que un planificador nuevo se reconstruye desde lo guardado."""
+    # Arrange
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START + 30, timezone.utc)
+    scheduled = service.schedule_transfer(
+        source.id, destination.id, Decimal("1.00"), execute_at
+    )
+    restarted = TransactionService(
+        DatabaseSession(),
+        risk_engine=RiskEngine([]),
+        scheduler=TransferScheduler(clock=lambda: START),
+    )
+
+    # Act
+    restarted.rebuild_transfer_schedule()
+    restarted.execute_due_transfers(now=START + 30)
+
+    # Assert
+    assert scheduled.status == ScheduledTransferStatus.COMPLETED
+
+
+def test_cancel_unknown_scheduled_transfer():
+    """Prueba que cancelar una transferencia inexistente lanza una excepción."""
+    service, _, _ = _make_service()
+
+    with pytest.raises(ScheduledTransferNotFoundError):
+        service.cancel_scheduled_transfer(uuid4())
+
+
+def test_schedule_transfer_rejects_past_dates():
+    """Prueba que no se puede programar una transferencia para una fecha pasada."""
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START - 1, timezone.utc)
+
+    with pytest.raises(ValueError):
+        service.schedule_transfer(
+            source.id, destination.id, Decimal("1.00"), execute_at
+        )
+
+
+def test_execute_due_transfers_respects_batch_limit():
+    """Prueba que las vencidas que no caben en un lote se ejecutan en el siguiente."""
+    # Arrange
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START + 5, timezone.utc)
+    scheduled = [
+        service.schedule_transfer(
+            source.id, destination.id, Decimal("1.00"), execute_at
+        )
+        for _ in range(5)
+    ]
+    service.cancel_scheduled_transfer(scheduled[4].id)
+
+    # Act
+    first = service.execute_due_transfers(now=START + 5, limit=3)
+    second = service.execute_due_transfers(now=START + 5, limit=3)
+    third = service.execute_due_transfers(now=START + 5, limit=3)
+
+    # Assert
+    assert (first, second, third) == (3, 1, 0)
+    assert [s.status for s in scheduled[:4]] == [ScheduledTransferStatus.COMPLETED] * 4
+    assert service.get_account(destination.id).balance == Decimal("4.00")
+
+
+def test_cancel_removes_transfer_waiting_for_the_next_batch():
+    """Prueba que cancelar una vencida que espera en la cola la saca del siguiente lote."""
+    # Arrange
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START + 5, timezone.utc)
+    scheduled = [
+        service.schedule_transfer(
+            source.id, destination.id, Decimal("1.00"), execute_at
+        )
+        for _ in range(4)
+    ]
+    service.execute_due_transfers(now=START + 5, limit=1)
+
+    # Act
+    service.cancel_scheduled_transfer(scheduled[2].id)
+    waiting = len(service.scheduler)
+    remaining = service.scheduler.pop_due(now=START + 5)
+
+    # Assert
+    assert waiting == 2
+    assert remaining == [scheduled[1].id, scheduled[3].id]
+    assert len(service.scheduler) == 0
+
+
+def test_list_scheduled_transfers_by_account_with_pagination():
+    """Prueba el listado por cuenta (índice) con filtro de estado y paginación."""
+    # Arrange
+    service, source, destination = _make_service()
+    other = service.create_account("Otro", Decimal("0.00"))
+    execute_at = datetime.fromtimestamp(START + 60, timezone.utc)
+    to_destination = [
+        service.schedule_transfer(
+            source.id, destination.id, Decimal("1.00"), execute_at
+        )
+        for _ in range(4)
+    ]
+    service.schedule_transfer(source.id, other.id, Decimal("1.00"), execute_at)
+    service.cancel_scheduled_transfer(to_destination[1].id)
+
+    # Act
+    page = service.get_scheduled_transfers(account_id=destination.id, limit=2)
+    pending = service.get_scheduled_transfers(
+        account_id=destination.id,
+        status=ScheduledTransferStatus.PENDING,
+        offset=1,
+        limit=5,
+    )
+
+    # Assert
+    assert [s.id for s in page] == [s.id for s in to_destination[:2]]
+    assert [s.id for s in pending] == [to_destination[2].id, to_destination[3].id]
+    assert len(service.get_scheduled_transfers(account_id=source.id)) == 5
+    with pytest.raises(ValueError):
+        service.get_scheduled_transfers(limit=0)
+
+
+def test_list_all_scheduled_transfers_in_creation_order():
+    """Prueba el listado sin cuenta: orden de creación, filtro de estado y paginación."""
+    # Arrange
+    service, source, destination = _make_service()
+    execute_at = datetime.fromtimestamp(START + 60, timezone.utc)
+    scheduled = [
+        service.schedule_transfer(
+            source.id, destination.id, Decimal("1.00"), execute_at
+        )
+        for _ in range(5)
+    ]
+    service.cancel_scheduled_transfer(scheduled[0].id)
+
+    # Act
+    page = service.get_scheduled_transfers(offset=1, limit=2)
+    pending = service.get_scheduled_transfers(
+        status=ScheduledTransferStatus.PENDING, offset=2, limit=5
+    )
+
+    # Assert
+    assert [s.id for s in page] == [s.id for s in scheduled[1:3]]
+    assert [s.id for s in pending] == [s.id for s in scheduled[3:]]